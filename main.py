@@ -1,8 +1,12 @@
 import os
+import sys
 from src.hidden_markov_model import HMM
 from src.viterbi_decoder import ViterbiDecoder
 from src.sequence_generator import SequenceGenerator
 from src.file_parser import FileParser
+from src.tracing import ConsoleTracer
+from src.model_io import load_model
+from src.cli import run
 
 # =============================
 # Hilfsfunktionen für Nutzereingaben
@@ -65,7 +69,8 @@ def ask_yes_no(prompt: str) -> bool:
 def ask_hmm() -> HMM:
     """Fragt den Benutzer, ob er ein fertiges HMM laden oder manuell erstellen möchte."""
     print("\n=== HMM-Konfiguration ===")
-    choice = ask_choice("Wie möchten Sie das HMM erstellen?", ["Würfelproblem (vordefiniert)", "Selbst eingeben"])
+    choice = ask_choice("Wie möchten Sie das HMM erstellen?",
+                        ["Würfelproblem (vordefiniert)", "Selbst eingeben", "Aus Datei laden"])
 
     if choice == "Würfelproblem (vordefiniert)":
         # Klassisches Würfelproblem-HMM mit fairem & geladenem Würfel
@@ -81,6 +86,15 @@ def ask_hmm() -> HMM:
         }
         return HMM(states, start_prob, transition_prob, emission_prob)
 
+    elif choice == "Aus Datei laden":
+        # Modell im Binär- oder JSON-Format (siehe src/model_io.py)
+        while True:
+            filepath = input("Pfad zur Modelldatei eingeben (.bin oder .json): ").strip()
+            try:
+                return load_model(filepath)
+            except Exception as e:
+                print(f"[ERROR] Modell konnte nicht geladen werden: {e}")
+
     else:
         # Benutzerdefiniertes HMM erstellen
         num_states = ask_int("Wie viele Zustände hat das HMM?", min_val=1)
@@ -161,7 +175,7 @@ def main():
 
     # 3. Log-Modus wählen
     use_log = ask_yes_no("Soll mit logarithmischer Wahrscheinlichkeit gerechnet werden?")
-    decoder = ViterbiDecoder(hmm, use_log=use_log)
+    decoder = ViterbiDecoder(hmm, use_log=use_log, tracer=ConsoleTracer())
 
     # 4. Viterbi-Algorithmus ausführen
     print("\nViterbi-Decodierung wird durchgeführt...")
@@ -202,4 +216,7 @@ def main():
         print("")
 
 if __name__ == "__main__":
+    # Mit Argumenten (z. B. "python main.py decode ...") ohne Rückfragen, sonst interaktives Menü
+    if len(sys.argv) > 1:
+        sys.exit(run(sys.argv[1:]))
     main()
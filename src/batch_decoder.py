@@ -0,0 +1,271 @@
+import math
+import os
+import time
+from array import array
+from collections import deque
+from multiprocessing import Pool
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+from src.compiled_hmm import index_array, index_typecode
+from src.viterbi_decoder import ViterbiDecoder
+
+try:
+    import numpy as np
+except ImportError:  # NumPy ist optional und wird nur für decode_batch(_encoded) benötigt
+    np = None
+
+
+# Höchstens so viele Arbeitspakete pro Worker werden gleichzeitig an den Pool übergeben
+MAX_PENDING_PER_WORKER = 4
+
+
+class BatchStats:
+    """Durchsatz einer Batch-Dekodierung (wird während der Dekodierung befüllt)."""
+
+    def __init__(self):
+        self.sequences = 0
+        self.symbols = 0
+        self.seconds = 0.0
+
+    @property
+    def sequences_per_second(self) -> float:
+        """Durchsatz in Sequenzen pro Sekunde."""
+        return self.sequences / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def symbols_per_second(self) -> float:
+        """Durchsatz in Symbolen pro Sekunde."""
+        return self.symbols / self.seconds if self.seconds > 0 else 0.0
+
+    def summary(self) -> str:
+        """Kurze, lesbare Zusammenfassung."""
+        return (f"{self.sequences} Sequenzen, {self.symbols} Symbole in {self.seconds:.3f} s "
+                f"({self.sequences_per_second:,.1f} Sequenzen/s, {self.symbols_per_second:,.0f} Symbole/s)")
+
+
+# ---------- Worker-Prozesse ----------
+# Jeder Worker erhält das kompilierte Modell genau einmal (über den Initializer)
+# und baut daraus seinen eigenen Decoder.
+_worker_decoder: Optional[ViterbiDecoder] = None
+
+
+def _init_worker(model, settings: dict):
+    """Initializer der Worker-Prozesse: baut den Decoder einmal pro Prozess."""
+    global _worker_decoder
+    settings = dict(settings)
+    # "classic" ist die Lehrversion – in Workern wird die Backpointer-Variante genutzt (gleiches Ergebnis,
+    # bricht aber nicht schon bei einzelnen unerreichbaren Zellen ab),
+    # "parallel" würde selbst wieder Prozesse starten
+    if settings["engine"] in ("classic", "parallel"):
+        settings["engine"] = "backpointer"
+    _worker_decoder = ViterbiDecoder(model, **settings)
+
+
+def _decode_chunk(chunk: List[Tuple[int, Sequence[str]]]) -> List[Tuple[int, array]]:
+    """Dekodiert ein Arbeitspaket im Worker; Pfade werden als kompakte Index-Arrays zurückgegeben."""
+    decoder = _worker_decoder
+    results = []
+    for index, observations in chunk:
+        # Bereits kodierte Arrays werden direkt dekodiert (Puffer wurden in _chunks kopiert)
+        codes = observations if isinstance(observations, array) else decoder.model.encode(observations)
+        results.append((index, decoder.decode_encoded(codes)))
+    return results
+
+
+def _chunks(sequences: Iterable[Sequence[str]], chunk_symbols: int) -> Iterator[List[Tuple[int, Sequence[str]]]]:
+    """
+    Teilt die Eingabe in Pakete mit jeweils etwa chunk_symbols Symbolen auf.
+    Kurze Sequenzen werden gebündelt, lange Sequenzen bilden ein eigenes Paket,
+    damit die Worker gleichmäßig ausgelastet sind.
+
+    Kodierte Puffer (z. B. memoryviews aus model_io.load_sequence) lassen sich nicht
+    pickeln und werden daher, wie in CompiledHMM.__getstate__, in eigene Arrays kopiert.
+    """
+    chunk = []
+    size = 0
+    for index, observations in enumerate(sequences):
+        if isinstance(observations, (memoryview, bytes, bytearray)):
+            observations = array(memoryview(observations).format, observations)
+        chunk.append((index, observations))
+        size += len(observations)
+        if size >= chunk_symbols:
+            yield chunk
+            chunk = []
+            size = 0
+    if chunk:
+        yield chunk
+
+
+# ---------- Öffentliche Funktionen ----------
+def decode_many(decoder: ViterbiDecoder, sequences: Iterable[Sequence[str]], workers: Optional[int] = None,
+                ordered: bool = True, chunk_symbols: int = 100_000,
+                stats: Optional[BatchStats] = None, encoded: bool = False) -> Iterator:
+    """
+    Dekodiert viele unabhängige Sequenzen parallel in einem Prozess-Pool.
+
+    - workers:       Anzahl der Prozesse (None → Anzahl CPU-Kerne, 1 → ohne Pool im aktuellen Prozess)
+    - ordered:       True → Pfade in Eingabereihenfolge; False → (Index, Pfad) sobald fertig
+    - chunk_symbols: Zielgröße eines Arbeitspakets in Symbolen
+    - stats:         optionales BatchStats-Objekt, das mit dem Durchsatz befüllt wird
+    - encoded:       True → Pfade als Index-Arrays statt als Listen von Zustandsnamen
+
+    Sequenzen können als Symbolfolgen oder bereits kodiert (array, memoryview) übergeben werden.
+    Die Ergebnisse werden als Generator gestreamt; die Eingabe wird dabei nur so weit gelesen,
+    wie Pakete in Arbeit sind (höchstens MAX_PENDING_PER_WORKER pro Worker), der Speicherbedarf
+    hängt also nicht von der Anzahl der Sequenzen ab.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if stats is None:
+        stats = BatchStats()
+    states = decoder.model.states
+    started = time.perf_counter()
+
+    def collect(results):
+        for index, path in results:
+            stats.sequences += 1
+            stats.symbols += len(path)
+            stats.seconds = time.perf_counter() - started
+            if not encoded:
+                path = [states[i] for i in path]
+            yield path if ordered else (index, path)
+
+    init_args = (decoder.model, decoder.settings())
+    if workers <= 1:
+        _init_worker(*init_args)
+        for chunk in _chunks(sequences, chunk_symbols):
+            yield from collect(_decode_chunk(chunk))
+        return
+
+    # Pool.imap würde die Eingabe vollständig im Voraus lesen; es werden daher höchstens
+    # MAX_PENDING_PER_WORKER Pakete pro Worker gleichzeitig abgeschickt
+    in_flight = deque()
+
+    def take():
+        if not ordered:
+            for result in in_flight:
+                if result.ready():
+                    in_flight.remove(result)
+                    return result.get()
+        return in_flight.popleft().get()
+
+    with Pool(workers, initializer=_init_worker, initargs=init_args) as pool:
+        for chunk in _chunks(sequences, chunk_symbols):
+            in_flight.append(pool.apply_async(_decode_chunk, (chunk,)))
+            if len(in_flight) >= workers * MAX_PENDING_PER_WORKER:
+                yield from collect(take())
+        while in_flight:
+            yield from collect(take())
+
+
+def decode_batch(decoder: ViterbiDecoder, sequences: Sequence[Sequence[str]],
+                 stats: Optional[BatchStats] = None) -> List[List[str]]:
+    """
+    Dekodiert B Sequenzen gleicher Länge T gemeinsam als 3-D-Array-Operation:
+    Pro Zeitschritt wird scores[b, i, j] für alle Sequenzen auf einmal berechnet.
+    Ergebnis und Tie-Breaking entsprechen der Engine "backpointer". Benötigt NumPy.
+    """
+    if np is None:
+        raise ImportError("decode_batch benötigt NumPy (pip install numpy).")
+    model = decoder.model
+    results = decode_batch_encoded(decoder, [model.encode(observations) for observations in sequences], stats)
+    return [model.state_names(path) for path, _ in results]
+
+
+def decode_batch_encoded(decoder: ViterbiDecoder, sequences: Sequence[Sequence[int]],
+                         stats: Optional[BatchStats] = None) -> List[Tuple[array, float]]:
+    """
+    Wie decode_batch, aber für bereits kodierte Sequenzen: liefert pro Sequenz
+    (Pfad als Index-Array, Log-Wahrscheinlichkeit) wie ViterbiDecoder.decode_encoded_with_log_probability.
+    Hat eine Sequenz keinen gültigen Pfad, wird für den ganzen Batch ein ValueError ausgelöst.
+    """
+    if np is None:
+        raise ImportError("decode_batch_encoded benötigt NumPy (pip install numpy).")
+    if not sequences:
+        return []
+    length = len(sequences[0])
+    if any(len(codes) != length for codes in sequences):
+        raise ValueError("decode_batch erwartet Sequenzen gleicher Länge.")
+    model = decoder.model
+    n = model.n_states
+    if length == 0:
+        return [(index_array(n, 0), 0.0) for _ in sequences]
+
+    started = time.perf_counter()
+    batch = len(sequences)
+    use_log = decoder.use_log
+    scaled = decoder.scaled
+
+    codes = np.array([np.asarray(sequence) for sequence in sequences], dtype=np.intp)  # (B, T)
+    start, transitions, emissions = model.numpy_tables(use_log)
+    emit_by_symbol = np.ascontiguousarray(emissions.T)  # (M, N)
+    invalid = -np.inf if use_log else 0.0
+
+    backpointers = np.zeros((length - 1, batch, n), dtype=np.dtype(index_typecode(n)))
+    scores = np.empty((batch, n, n), dtype=np.float64)
+    rows = np.arange(batch)[:, None]
+    targets = np.arange(n)[None, :]
+    # Log-Skalierungsfaktoren ("scaled") getrennt nach Initialisierung und Rekursion,
+    # in derselben Summationsreihenfolge wie die anderen Engines
+    initial_scale = [0.0] * batch
+    step_scale = [0.0] * batch
+
+    def rescale(column, scale):
+        maximum = column.max(axis=1, keepdims=True)
+        rescaled = maximum[:, 0] < decoder.RESCALE_BELOW
+        for b in np.flatnonzero(rescaled).tolist():
+            scale[b] += math.log(maximum[b, 0])
+        return np.where(rescaled[:, None], column / maximum, column)
+
+    if use_log:
+        column = start + emit_by_symbol[codes[:, 0]]  # (B, N)
+    else:
+        column = start * emit_by_symbol[codes[:, 0]]
+        if scaled:
+            if (column.max(axis=1) <= 0.0).any():
+                raise ValueError("Kein gültiger Pfad gefunden.")
+            column = rescale(column, initial_scale)
+
+    for t in range(1, length):
+        # Gleiche Rechenreihenfolge wie die anderen Engines: (V + Übergang) + Emission
+        emit = emit_by_symbol[codes[:, t]][:, None, :]  # (B, 1, N)
+        if use_log:
+            np.add(column[:, :, None], transitions, out=scores)
+            scores += emit
+        else:
+            np.multiply(column[:, :, None], transitions, out=scores)
+            scores *= emit
+        best_prev = scores.argmax(axis=1)  # (B, N)
+        column = scores[rows, best_prev, targets]
+        backpointers[t - 1] = best_prev
+
+        if (column.max(axis=1) == invalid).any():
+            raise ValueError("Kein gültiger Pfad gefunden.")
+        if scaled:
+            column = rescale(column, step_scale)
+
+    # Traceback für alle Sequenzen gleichzeitig
+    paths = np.empty((batch, length), dtype=np.intp)
+    state = column.argmax(axis=1)
+    paths[:, -1] = state
+    batch_index = np.arange(batch)
+    for t in range(length - 1, 0, -1):
+        state = backpointers[t - 1, batch_index, state]
+        paths[:, t - 1] = state
+
+    final_states = paths[:, -1].tolist()
+    results = []
+    for b, path in enumerate(paths.tolist()):
+        value = float(column[b, final_states[b]])
+        if use_log:
+            log_probability = value
+        elif value <= 0.0:
+            log_probability = float("-inf")
+        else:
+            log_probability = math.log(value) + (initial_scale[b] + step_scale[b])
+        results.append((array(index_typecode(n), path), log_probability))
+
+    if stats is not None:
+        stats.sequences += batch
+        stats.symbols += batch * length
+        stats.seconds += time.perf_counter() - started
+    return results
@@ -0,0 +1,421 @@
+import csv
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from array import array
+from itertools import product
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from src.hidden_markov_model import HMM
+from src.compiled_hmm import index_typecode
+from src.model_io import load_model, load_sequence, save_model, save_sequence
+from src.sequence_generator import SequenceGenerator
+from src.viterbi_decoder import ViterbiDecoder
+
+try:
+    import numpy as np
+except ImportError:  # NumPy ist optional; ohne NumPy wird die Engine "numpy" übersprungen
+    np = None
+
+try:
+    import resource
+except ImportError:  # resource gibt es nur auf Unix-Systemen; ohne wird kein RSS gemessen
+    resource = None
+
+# Die Lehrversion "classic" kopiert in jedem Schritt alle Pfade (Aufwand O(N·T²))
+# und wird daher nur bis zu dieser Länge gemessen
+CLASSIC_MAX_LENGTH = 20_000
+
+# Spalten der CSV-Ausgabe (und Felder von BenchmarkResult.to_dict)
+FIELDS = ("n_states", "n_symbols", "sparsity", "length", "seed", "engine", "numeric_mode", "status",
+          "seconds", "symbols_per_second", "cells_per_second", "rss_before", "peak_rss",
+          "digest", "agrees", "message")
+
+
+class BenchmarkCase:
+    """Ein synthetisches Modell (N Zustände, M Symbole, Anteil fehlender Übergänge) und eine Sequenzlänge."""
+
+    def __init__(self, n_states: int, n_symbols: int, length: int, sparsity: float = 0.0, seed: int = 0):
+        if not 0.0 <= sparsity < 1.0:
+            raise ValueError("sparsity muss im Bereich [0, 1) liegen.")
+        self.n_states = n_states
+        self.n_symbols = n_symbols
+        self.length = length
+        self.sparsity = sparsity
+        self.seed = seed
+
+    def key(self) -> tuple:
+        """Schlüssel zum Vergleich mit früheren Läufen."""
+        return self.n_states, self.n_symbols, self.sparsity, self.length
+
+    def __repr__(self) -> str:
+        return (f"BenchmarkCase(N={self.n_states}, M={self.n_symbols}, "
+                f"sparsity={self.sparsity}, T={self.length})")
+
+
+class BenchmarkResult:
+    """Messergebnis einer Engine auf einem BenchmarkCase."""
+
+    def __init__(self, case: BenchmarkCase, engine: str, numeric_mode: str, status: str = "ok",
+                 seconds: Optional[float] = None, rss_before: Optional[int] = None,
+                 peak_rss: Optional[int] = None, digest: Optional[str] = None, message: str = ""):
+        self.case = case
+        self.engine = engine
+        self.numeric_mode = numeric_mode
+        self.status = status            # "ok", "uebersprungen" oder "fehler"
+        self.seconds = seconds          # reine Dekodierzeit (ohne Laden und Prozessstart)
+        self.rss_before = rss_before    # Spitzen-RSS in Bytes vor der Dekodierung (Modell und Sequenz geladen)
+        self.peak_rss = peak_rss        # Spitzen-RSS in Bytes nach der Dekodierung
+        self.digest = digest            # Hash des Pfades, um Engines zu vergleichen
+        self.agrees: Optional[bool] = None
+        self.message = message
+
+    @property
+    def symbols_per_second(self) -> Optional[float]:
+        """Durchsatz in Symbolen pro Sekunde."""
+        if not self.seconds:
+            return None
+        return self.case.length / self.seconds
+
+    @property
+    def cells_per_second(self) -> Optional[float]:
+        """Durchsatz in Trellis-Zellen (T×N) pro Sekunde."""
+        if not self.seconds:
+            return None
+        return self.case.length * self.case.n_states / self.seconds
+
+    def to_dict(self) -> dict:
+        """Alle Felder als Dictionary (Reihenfolge wie FIELDS)."""
+        values = {
+            "n_states": self.case.n_states,
+            "n_symbols": self.case.n_symbols,
+            "sparsity": self.case.sparsity,
+            "length": self.case.length,
+            "seed": self.case.seed,
+            "engine": self.engine,
+            "numeric_mode": self.numeric_mode,
+            "status": self.status,
+            "seconds": self.seconds,
+            "symbols_per_second": self.symbols_per_second,
+            "cells_per_second": self.cells_per_second,
+            "rss_before": self.rss_before,
+            "peak_rss": self.peak_rss,
+            "digest": self.digest,
+            "agrees": self.agrees,
+            "message": self.message,
+        }
+        return {field: values[field] for field in FIELDS}
+
+
+# =============================
+# Synthetische Modelle
+# =============================
+
+def synthetic_hmm(n_states: int, n_symbols: int, sparsity: float = 0.0, seed: Optional[int] = None) -> HMM:
+    """
+    Zufälliges HMM für Messungen. Mit sparsity wird dieser Anteil der Übergänge jeder Zeile
+    auf 0 gesetzt (der Selbstübergang bleibt immer erhalten). Selbstübergänge sind stärker
+    gewichtet, damit die Zustandsfolgen wie beim Würfelproblem aus längeren Läufen bestehen.
+    """
+    rng = random.Random(seed)
+    states = [f"S{i}" for i in range(n_states)]
+    symbols = [f"o{k}" for k in range(n_symbols)]
+
+    def distribution(keys, weights):
+        total = sum(weights)
+        return {key: weight / total for key, weight in zip(keys, weights)}
+
+    transitions = {}
+    for i, state in enumerate(states):
+        weights = [rng.uniform(0.5, 1.5) for _ in states]
+        weights[i] += n_states
+        removed = [j for j in range(n_states) if j != i]
+        rng.shuffle(removed)
+        for j in removed[:int(sparsity * n_states)]:
+            weights[j] = 0.0
+        transitions[state] = distribution(states, weights)
+
+    return HMM(
+        states,
+        distribution(states, [rng.uniform(0.5, 1.5) for _ in states]),
+        transitions,
+        {state: distribution(symbols, [rng.uniform(0.1, 1.5) for _ in symbols]) for state in states},
+    )
+
+
+def make_cases(states: Sequence[int] = (2, 8, 32), lengths: Sequence[int] = (1_000, 10_000, 100_000),
+               symbols: Sequence[int] = (6,), sparsity: Sequence[float] = (0.0,),
+               seed: int = 0) -> List[BenchmarkCase]:
+    """Alle Kombinationen der Parameter als Liste von BenchmarkCases."""
+    return [BenchmarkCase(n, m, t, s, seed) for n, m, s, t in product(states, symbols, sparsity, lengths)]
+
+
+def make_variants(engines: Optional[Sequence[str]] = None,
+                  numeric_modes: Sequence[str] = ("log",)) -> List[Tuple[str, str]]:
+    """
+    (Engine, Zahlendarstellung)-Paare; ungültige Kombinationen ("parallel" nur mit "log",
+    "classic" nicht mit "scaled") werden ausgelassen. "classic" ist die ursprüngliche
+    dict-basierte Version und dient als Vergleichsbasis.
+    """
+    engines = list(engines) if engines else list(ViterbiDecoder.ENGINES)
+    variants = []
+    for engine, mode in product(engines, numeric_modes):
+        if engine not in ViterbiDecoder.ENGINES:
+            raise ValueError(f"Unbekannte Engine '{engine}'. Erlaubt: {', '.join(ViterbiDecoder.ENGINES)}")
+        if (engine == "parallel" and mode != "log") or (engine == "classic" and mode == "scaled"):
+            continue
+        variants.append((engine, mode))
+    return variants
+
+
+# =============================
+# Messung (in einem eigenen Prozess)
+# =============================
+
+def _peak_rss() -> Optional[int]:
+    """Bisheriger Spitzen-RSS des Prozesses in Bytes (None, wenn nicht messbar)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux meldet KiB, macOS Bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _measure(model_path: str, sequence_path: str, engine: str, numeric_mode: str, repeat: int = 1) -> dict:
+    """Lädt Modell und Sequenz, dekodiert repeat-mal und misst die schnellste Zeit und den Speicher."""
+    model = load_model(model_path).compile()
+    codes = load_sequence(sequence_path, model).observations
+    decoder = ViterbiDecoder(model, engine=engine, numeric_mode=numeric_mode)
+
+    if engine == "classic":
+        # Die Lehrversion arbeitet mit Symbolnamen; die Umwandlung wird nicht mitgemessen
+        observations = model.symbol_names(codes)
+        run = lambda: model.encode_states(decoder.decode(observations))
+    else:
+        run = lambda: decoder.decode_encoded(codes)
+
+    rss_before = _peak_rss()
+    seconds = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        path = run()
+        elapsed = time.perf_counter() - started
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+
+    path = array(index_typecode(model.n_states), path)
+    return {
+        "seconds": seconds,
+        "rss_before": rss_before,
+        "peak_rss": _peak_rss(),
+        "digest": hashlib.blake2b(path.tobytes(), digest_size=16).hexdigest(),
+    }
+
+
+def _child(connection, arguments):
+    """Einstiegspunkt des Messprozesses: Ergebnis oder Fehlermeldung über die Pipe zurückschicken."""
+    try:
+        connection.send(("ok", _measure(*arguments)))
+    except Exception as e:
+        connection.send(("fehler", f"{type(e).__name__}: {e}"))
+    finally:
+        connection.close()
+
+
+def _isolated(arguments: tuple, timeout: Optional[float]) -> Tuple[str, object]:
+    """
+    Führt _measure in einem frisch gestarteten Prozess aus ("spawn"), damit der Spitzen-RSS
+    nur diese eine Messung enthält. Kein Pool: die Engine "parallel" startet selbst Prozesse.
+    """
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_child, args=(sender, arguments))
+    process.start()
+    sender.close()
+    try:
+        if not receiver.poll(timeout):
+            process.terminate()
+            return "fehler", f"Zeitlimit von {timeout} s überschritten"
+        return receiver.recv()
+    except EOFError:
+        return "fehler", f"Messprozess abgebrochen (Exit-Code {process.exitcode})"
+    finally:
+        process.join()
+        receiver.close()
+
+
+# =============================
+# Durchlauf
+# =============================
+
+def run_benchmark(cases: Iterable[BenchmarkCase], variants: Sequence[Tuple[str, str]],
+                  repeat: int = 1, isolate: bool = True, max_work: Optional[float] = 5e7,
+                  timeout: Optional[float] = None, workdir: Optional[str] = None) -> Iterator[BenchmarkResult]:
+    """
+    Misst alle Varianten auf allen Fällen und liefert die Ergebnisse, sobald sie vorliegen.
+
+    - repeat:   Wiederholungen pro Messung; gemeldet wird die schnellste
+    - isolate:  jede Messung in einem eigenen Prozess (saubere Spitzen-RSS-Werte);
+                False → im aktuellen Prozess (RSS-Werte sind dann kumulativ)
+    - max_work: Fälle mit T·N² über diesem Wert werden für die reinen Python-Engines
+                übersprungen (None → keine Grenze)
+    - timeout:  Zeitlimit pro Messung in Sekunden, inklusive Prozessstart und Laden (nur mit isolate)
+    - workdir:  Verzeichnis für Modell- und Sequenzdateien (Standard: temporär)
+
+    Pro Fall werden Modell und Sequenz einmal erzeugt und im Binärformat gespeichert; die
+    Messprozesse bilden sie per mmap ab. Alle erfolgreichen Pfade eines Falls werden mit
+    dem ersten erfolgreichen Pfad verglichen (agrees).
+    """
+    with tempfile.TemporaryDirectory(dir=workdir) as directory:
+        for index, case in enumerate(cases):
+            hmm = synthetic_hmm(case.n_states, case.n_symbols, case.sparsity, case.seed)
+            model_path = os.path.join(directory, f"modell_{index}.bin")
+            sequence_path = os.path.join(directory, f"sequenz_{index}.bin")
+            save_model(hmm, model_path)
+            observations, _ = SequenceGenerator(hmm, seed=case.seed).generate_encoded(case.length)
+            save_sequence(sequence_path, hmm, observations)
+            del observations
+
+            reference = None
+            for engine, numeric_mode in variants:
+                result = BenchmarkResult(case, engine, numeric_mode)
+                reason = _skip_reason(case, engine, max_work)
+                if reason:
+                    result.status, result.message = "uebersprungen", reason
+                    yield result
+                    continue
+
+                arguments = (model_path, sequence_path, engine, numeric_mode, repeat)
+                if isolate:
+                    status, value = _isolated(arguments, timeout)
+                else:
+                    try:
+                        status, value = "ok", _measure(*arguments)
+                    except Exception as e:
+                        status, value = "fehler", f"{type(e).__name__}: {e}"
+
+                if status != "ok":
+                    result.status, result.message = status, value
+                else:
+                    for name, measured in value.items():
+                        setattr(result, name, measured)
+                    if reference is None:
+                        reference = result.digest
+                    result.agrees = result.digest == reference
+                yield result
+
+
+def _skip_reason(case: BenchmarkCase, engine: str, max_work: Optional[float]) -> str:
+    """Grund, eine Messung auszulassen (leer → messen)."""
+    if engine == "numpy" and np is None:
+        return "NumPy nicht installiert"
+    if engine == "classic" and case.length > CLASSIC_MAX_LENGTH:
+        return f"classic nur bis T = {CLASSIC_MAX_LENGTH}"
+    if max_work is not None and engine != "numpy" and case.length * case.n_states ** 2 > max_work:
+        return f"T·N² über {max_work:g}"
+    return ""
+
+
+# =============================
+# Auswertung
+# =============================
+
+def scaling(results: Iterable[BenchmarkResult]) -> List[dict]:
+    """
+    Skalierung der Laufzeit mit der Sequenzlänge: Für jede Engine und jedes Modell die
+    Steigung von log(Zeit) über log(T) (1.0 = linear). Benötigt mindestens zwei Längen.
+    """
+    groups: Dict[tuple, List[Tuple[int, float]]] = {}
+    for result in results:
+        if result.status == "ok" and result.seconds:
+            case = result.case
+            key = (result.engine, result.numeric_mode, case.n_states, case.n_symbols, case.sparsity)
+            groups.setdefault(key, []).append((case.length, result.seconds))
+
+    curves = []
+    for (engine, numeric_mode, n_states, n_symbols, sparsity), points in groups.items():
+        points.sort()
+        exponent = None
+        if len({length for length, _ in points}) >= 2:
+            xs = [math.log(length) for length, _ in points]
+            ys = [math.log(seconds) for _, seconds in points]
+            mean_x = sum(xs) / len(xs)
+            mean_y = sum(ys) / len(ys)
+            variance = sum((x - mean_x) ** 2 for x in xs)
+            exponent = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance
+        curves.append({
+            "engine": engine, "numeric_mode": numeric_mode, "n_states": n_states,
+            "n_symbols": n_symbols, "sparsity": sparsity, "exponent": exponent,
+            "points": [{"length": length, "seconds": seconds} for length, seconds in points],
+        })
+    return curves
+
+
+def environment() -> dict:
+    """Angaben zur Messumgebung (werden in die JSON-Ausgabe geschrieben)."""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__ if np is not None else None,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def write_json(path: str, results: Sequence[BenchmarkResult]):
+    """Schreibt Ergebnisse, Skalierungskurven und Umgebung als JSON."""
+    document = {
+        "format": "viterbi-benchmark",
+        "environment": environment(),
+        "results": [result.to_dict() for result in results],
+        "scaling": scaling(results),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, ensure_ascii=False, indent=2)
+
+
+def write_csv(path: str, results: Sequence[BenchmarkResult]):
+    """Schreibt eine Zeile pro Messung (Spalten wie FIELDS)."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        for result in results:
+            writer.writerow(result.to_dict())
+
+
+def find_regressions(results: Sequence[BenchmarkResult], baseline_path: str,
+                     tolerance: float = 0.2) -> List[str]:
+    """
+    Vergleicht mit einer früheren JSON-Ausgabe. Gemeldet werden Messungen, die mehr als
+    tolerance (Anteil) langsamer sind, und Engines, deren Pfad nicht mehr übereinstimmt.
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        document = json.load(f)
+    if document.get("format") != "viterbi-benchmark":
+        raise ValueError(f"Datei '{baseline_path}' enthält keine Benchmark-Ergebnisse.")
+
+    baseline = {}
+    for entry in document["results"]:
+        if entry["status"] == "ok":
+            key = (entry["n_states"], entry["n_symbols"], entry["sparsity"], entry["length"],
+                   entry["engine"], entry["numeric_mode"])
+            baseline[key] = entry
+
+    messages = []
+    for result in results:
+        label = f"{result.engine}/{result.numeric_mode} {result.case!r}"
+        if result.agrees is False:
+            messages.append(f"{label}: Pfad weicht von der Referenz ab")
+        previous = baseline.get(result.case.key() + (result.engine, result.numeric_mode))
+        if previous is None or result.status != "ok":
+            continue
+        if result.seconds > previous["seconds"] * (1 + tolerance):
+            messages.append(f"{label}: {result.seconds:.4f} s statt {previous['seconds']:.4f} s "
+                            f"(+{(result.seconds / previous['seconds'] - 1) * 100:.0f} %)")
+    return messages
@@ -0,0 +1,502 @@
+import argparse
+import asyncio
+import glob
+import json
+import os
+import signal
+import sys
+import time
+from collections import deque
+from typing import Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+from src import benchmark
+from src.compiled_hmm import CompiledHMM
+from src.decode_server import DecodeServer
+from src.file_parser import FileParser, SequenceRecord
+from src.model_io import load_model
+from src.sequence_generator import SequenceGenerator
+from src.viterbi_decoder import ViterbiDecoder
+
+# Standardwerte der Kommandozeile (können per --config überschrieben werden)
+DEFAULT_ENGINE = "backpointer"
+DEFAULT_NUMERIC_MODE = "log"
+
+
+# =============================
+# Ein- und Ausgabe
+# =============================
+
+def expand_inputs(patterns: Sequence[str]) -> List[str]:
+    """Löst Dateinamen und Glob-Muster (z. B. "data/*.txt") in eine sortierte Dateiliste auf."""
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            raise FileNotFoundError(f"Keine Datei passt zu '{pattern}'.")
+        files.extend(matches)
+    return files
+
+
+def read_records(files: Sequence[str], model: CompiledHMM,
+                 with_states: bool = False) -> Iterator[SequenceRecord]:
+    """
+    Liest alle Datensätze der Dateien nacheinander ein (lazy, siehe FileParser.iter_records).
+    Datensätze ohne Namen (Dateien ohne Kopfzeile) erhalten den Dateinamen.
+    """
+    for path in files:
+        states = model.states if with_states else None
+        for record in FileParser.iter_records(path, model.symbols, states):
+            if not record.name:
+                record.name = path
+            yield record
+
+
+class PathFormatter:
+    """Schreibt Index-Arrays als Text: ohne Trennzeichen, wenn alle Namen einzelne Zeichen sind."""
+
+    def __init__(self, names: Sequence[str]):
+        self.names = list(names)
+        encoded = [str(name).encode("utf-8") for name in self.names]
+        # Übersetzungstabelle Index → Zeichen für bytes.translate (nur bei einzelnen Zeichen)
+        self.table = None
+        if all(len(name) == 1 for name in encoded) and len(encoded) <= 256:
+            table = bytearray(256)
+            for index, name in enumerate(encoded):
+                table[index] = name[0]
+            self.table = bytes(table)
+
+    def format(self, indices) -> str:
+        """Text einer Index-Folge."""
+        if self.table is not None:
+            return bytes(indices).translate(self.table).decode("utf-8")
+        names = self.names
+        return " ".join(names[i] for i in indices)
+
+
+def open_output(path: Optional[str]) -> TextIO:
+    """Ausgabedatei öffnen; None oder "-" → Standardausgabe."""
+    if path is None or path == "-":
+        return sys.stdout
+    return open(path, "w", encoding="utf-8")
+
+
+def make_decoder(model: CompiledHMM, args) -> ViterbiDecoder:
+    """Decoder mit den Einstellungen der Kommandozeile."""
+    return ViterbiDecoder(model, engine=args.engine, numeric_mode=args.numeric_mode,
+                          memory_limit=args.memory_limit, beam_width=args.beam_width, top_k=args.top_k)
+
+
+def decode_records(decoder: ViterbiDecoder, records: Iterable[SequenceRecord],
+                   jobs: int) -> Iterator[Tuple[SequenceRecord, object]]:
+    """
+    Dekodiert Datensätze und liefert (Datensatz, Pfad als Index-Array) in Eingabereihenfolge.
+    Mit jobs > 1 wird über decode_many in einem Prozess-Pool dekodiert.
+    """
+    if jobs == 1:
+        for record in records:
+            yield record, decoder.decode_encoded(record.observations)
+        return
+
+    # decode_many liest nur so viele Datensätze im Voraus, wie Pakete in Arbeit sind; die Reihenfolge
+    # der Ergebnisse entspricht der Eingabe, daher genügt eine Warteschlange für die Zuordnung
+    pending = deque()
+
+    def observations():
+        for record in records:
+            pending.append(record)
+            yield record.observations
+
+    for path in decoder.decode_many(observations(), workers=jobs or None, encoded=True):
+        yield pending.popleft(), path
+
+
+# =============================
+# Unterbefehle
+# =============================
+
+def cmd_decode(args) -> int:
+    """Dekodiert alle Datensätze; eine Zeile pro Datensatz: Name <TAB> Zustandsfolge."""
+    model = load_model(args.model).compile()
+    decoder = make_decoder(model, args)
+    formatter = PathFormatter(model.states)
+    records = read_records(expand_inputs(args.inputs), model)
+
+    out = open_output(args.output)
+    try:
+        for record, path in decode_records(decoder, records, args.jobs):
+            out.write(f"{record.name}\t{formatter.format(path)}\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+def cmd_evaluate(args) -> int:
+    """
+    Dekodiert Datensätze mit Zustandszeile und vergleicht mit den echten Zuständen.
+    Eine Zeile pro Datensatz (Name, Länge, Fehler, Genauigkeit) und eine Gesamtzeile.
+    """
+    model = load_model(args.model).compile()
+    decoder = make_decoder(model, args)
+    records = read_records(expand_inputs(args.inputs), model, with_states=True)
+
+    def labelled():
+        for record in records:
+            if record.states is None:
+                print(f"[WARN] Datensatz '{record.name}' hat keine Zustandszeile und wird übersprungen.",
+                      file=sys.stderr)
+                continue
+            if len(record.observations) == 0:
+                print(f"[WARN] Datensatz '{record.name}' enthält keine Beobachtungen und wird übersprungen.",
+                      file=sys.stderr)
+                continue
+            yield record
+
+    total = errors = 0
+    out = open_output(args.output)
+    try:
+        out.write("name\tlaenge\tfehler\tgenauigkeit\n")
+        for record, path in decode_records(decoder, labelled(), args.jobs):
+            length = len(path)
+            mismatches = sum(1 for predicted, true in zip(path, record.states) if predicted != true)
+            total += length
+            errors += mismatches
+            accuracy = 1 - mismatches / length if length else 1.0
+            out.write(f"{record.name}\t{length}\t{mismatches}\t{accuracy:.6f}\n")
+            out.flush()
+        if total:
+            out.write(f"gesamt\t{total}\t{errors}\t{1 - errors / total:.6f}\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+def cmd_generate(args) -> int:
+    """Erzeugt Zufallssequenzen im Dateiformat von FileParser (Zahlenfolge und Zustände)."""
+    model = load_model(args.model).compile()
+    symbols = PathFormatter(model.symbols)
+    states = PathFormatter(model.states)
+    if symbols.table is None or states.table is None:
+        raise ValueError("Zum Schreiben einer Datei müssen alle Symbole und Zustände einzelne Zeichen sein.")
+    generator = SequenceGenerator(model, seed=args.seed)
+
+    out = open_output(args.output)
+    try:
+        for index in range(1, args.count + 1):
+            observations, true_states = generator.generate_encoded(args.length)
+            out.write(f">{args.name}_{index}\n")
+            out.write(f"zahlenfolge: {symbols.format(observations)}\n")
+            out.write(f"zustaende:   {states.format(true_states)}\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+def cmd_bench(args) -> int:
+    """
+    Ohne Modell: Benchmark-Suite mit synthetischen Modellen (siehe src/benchmark.py).
+    Mit Modell und Eingabedateien: Laufzeit der gewählten Engines auf diesen Dateien.
+    """
+    if args.model is None:
+        return _bench_suite(args)
+    if not args.inputs:
+        raise ValueError("bench mit Modell benötigt mindestens eine Eingabedatei.")
+    return _bench_files(args)
+
+
+def _bench_suite(args) -> int:
+    """
+    Misst alle Varianten auf synthetischen Fällen; eine Zeile pro Messung (gestreamt).
+    Exit-Code 1, wenn Pfade abweichen oder (mit --baseline) Messungen langsamer geworden sind.
+    """
+    cases = benchmark.make_cases(
+        states=_int_list(args.states), lengths=_int_list(args.lengths), symbols=_int_list(args.symbols),
+        sparsity=[float(value) for value in args.sparsity.split(",")], seed=args.seed,
+    )
+    variants = benchmark.make_variants(args.engines.split(",") if args.engines else None,
+                                       args.numeric_modes.split(","))
+
+    results = []
+    out = open_output(args.output)
+    try:
+        out.write("n\tm\tsparsity\tlaenge\tengine\tmodus\tstatus\tsekunden\tsymbole_pro_s\tpeak_rss_mib\tgleich\n")
+        for result in benchmark.run_benchmark(cases, variants, repeat=args.repeat, isolate=not args.in_process,
+                                              max_work=args.max_work or None, timeout=args.timeout):
+            results.append(result)
+            case = result.case
+            seconds = f"{result.seconds:.6f}" if result.seconds is not None else "-"
+            rate = f"{result.symbols_per_second:.0f}" if result.symbols_per_second else "-"
+            rss = f"{result.peak_rss / 2**20:.1f}" if result.peak_rss is not None else "-"
+            same = {True: "ja", False: "NEIN", None: "-"}[result.agrees]
+            status = f"{result.status} ({result.message})" if result.message else result.status
+            out.write(f"{case.n_states}\t{case.n_symbols}\t{case.sparsity}\t{case.length}\t{result.engine}\t"
+                      f"{result.numeric_mode}\t{status}\t{seconds}\t{rate}\t{rss}\t{same}\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if args.json:
+        benchmark.write_json(args.json, results)
+    if args.csv:
+        benchmark.write_csv(args.csv, results)
+
+    problems = [f"{result.engine}/{result.numeric_mode} {result.case!r}: Pfad weicht von der Referenz ab"
+                for result in results if result.agrees is False]
+    if args.baseline:
+        problems = benchmark.find_regressions(results, args.baseline, args.tolerance)
+    for message in problems:
+        print(f"[WARN] {message}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+def _bench_files(args) -> int:
+    """
+    Misst die Laufzeit der gewählten Engines auf den Eingabedateien und prüft,
+    ob alle Engines dieselben Pfade liefern (Referenz: erste Engine).
+    """
+    model = load_model(args.model).compile()
+    records = list(read_records(expand_inputs(args.inputs), model))
+    symbols = sum(len(record) for record in records)
+    engines = args.engines.split(",") if args.engines else [e for e in ViterbiDecoder.ENGINES if e != "classic"]
+
+    out = open_output(args.output)
+    reference = None
+    try:
+        out.write("engine\tsymbole\tsekunden\tsymbole_pro_s\tgleich\n")
+        for engine in engines:
+            try:
+                decoder = make_decoder(model, argparse.Namespace(**dict(vars(args), engine=engine)))
+            except (ImportError, ValueError) as e:
+                print(f"[WARN] Engine '{engine}' übersprungen: {e}", file=sys.stderr)
+                continue
+            best = None
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                paths = [path for _, path in decode_records(decoder, records, args.jobs)]
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            if reference is None:
+                reference = paths
+            same = "ja" if paths == reference else "NEIN"
+            rate = symbols / best if best > 0 else 0.0
+            out.write(f"{engine}\t{symbols}\t{best:.6f}\t{rate:.0f}\t{same}\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+def cmd_serve(args) -> int:
+    """Startet den lokalen Dekodier-Dienst (siehe src/decode_server.py) bis Strg+C."""
+    server = DecodeServer(host=args.host, port=args.port, unix_path=args.unix, workers=args.workers,
+                          max_models=args.max_models, batch_window=args.batch_window / 1000,
+                          max_batch=args.max_batch, model_dir=args.model_dir,
+                          request_timeout=args.timeout or None)
+
+    async def serve():
+        await server.start()
+        # SIGTERM beendet den Server sauber (Worker-Pool und Unix-Socket werden aufgeräumt)
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except NotImplementedError:
+            pass
+        print(f"Dekodier-Dienst läuft unter {server.address} (Beenden mit Strg+C)", file=sys.stderr)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    return 0
+
+
+# =============================
+# Argumente
+# =============================
+
+def _positive(value: str) -> int:
+    """argparse-Typ für Ganzzahlen ≥ 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("muss mindestens 1 sein")
+    return number
+
+
+def _int_list(value: str) -> List[int]:
+    """Kommagetrennte Ganzzahlen, auch in Exponentialschreibweise ("1e3,1e6")."""
+    return [int(float(item)) for item in value.split(",")]
+
+
+def _not_negative(value: str) -> int:
+    """argparse-Typ für Ganzzahlen ≥ 0."""
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError("darf nicht negativ sein")
+    return number
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Parser mit den Unterbefehlen decode, evaluate, generate, bench und serve."""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--config", help="JSON-Datei mit Standardwerten für Optionen (z. B. {\"engine\": \"numpy\"})")
+    common.add_argument("-o", "--output", help="Ausgabedatei (Standard: Standardausgabe)")
+
+    sources = argparse.ArgumentParser(add_help=False)
+    sources.add_argument("model", help="Modelldatei (Binär oder JSON, siehe src/model_io.py)")
+    sources.add_argument("inputs", nargs="+", help="Sequenzdateien oder Glob-Muster")
+
+    decoding = argparse.ArgumentParser(add_help=False)
+    decoding.add_argument("-j", "--jobs", type=_not_negative, default=1,
+                          help="Anzahl paralleler Prozesse (0 → Anzahl CPU-Kerne, Standard: 1)")
+    decoding.add_argument("--numeric-mode", choices=ViterbiDecoder.NUMERIC_MODES, default=DEFAULT_NUMERIC_MODE,
+                          help=f"Zahlendarstellung (Standard: {DEFAULT_NUMERIC_MODE})")
+    decoding.add_argument("--memory-limit", type=int, help="Speicherlimit in Bytes für die Engine 'checkpoint'")
+    decoding.add_argument("--beam-width", type=float, help="Beam-Pruning für die Engine 'sparse'")
+    decoding.add_argument("--top-k", type=_positive, help="Top-K-Pruning für die Engine 'sparse'")
+
+    engine = argparse.ArgumentParser(add_help=False)
+    engine.add_argument("--engine", choices=ViterbiDecoder.ENGINES, default=DEFAULT_ENGINE,
+                        help=f"Dekodier-Engine (Standard: {DEFAULT_ENGINE})")
+
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Viterbi-Decoder ohne interaktive Eingaben. Ohne Unterbefehl startet das interaktive Menü.",
+    )
+    commands = parser.add_subparsers(dest="command", metavar="BEFEHL", required=True)
+
+    decode = commands.add_parser("decode", parents=[common, sources, decoding, engine],
+                                 help="Sequenzen dekodieren (eine Zeile pro Datensatz)")
+    decode.set_defaults(handler=cmd_decode)
+
+    evaluate = commands.add_parser("evaluate", parents=[common, sources, decoding, engine],
+                                   help="Dekodieren und mit den echten Zuständen vergleichen")
+    evaluate.set_defaults(handler=cmd_evaluate)
+
+    generate = commands.add_parser("generate", parents=[common], help="Zufallssequenzen erzeugen")
+    generate.add_argument("model", help="Modelldatei (Binär oder JSON)")
+    generate.add_argument("-n", "--length", type=_positive, required=True, help="Länge jeder Sequenz")
+    generate.add_argument("-c", "--count", type=_positive, default=1, help="Anzahl der Sequenzen (Standard: 1)")
+    generate.add_argument("--seed", type=int, help="Startwert des Zufallsgenerators")
+    generate.add_argument("--name", default="sequenz", help="Namenspräfix der Datensätze (Standard: sequenz)")
+    generate.set_defaults(handler=cmd_generate)
+
+    bench = commands.add_parser(
+        "bench", parents=[common, decoding], help="Laufzeit der Engines vergleichen",
+        description="Ohne Modell läuft die Benchmark-Suite mit synthetischen Modellen, "
+                    "mit Modell und Eingabedateien werden die Engines auf diesen Dateien gemessen.",
+    )
+    bench.add_argument("model", nargs="?", help="Modelldatei (optional, sonst synthetische Modelle)")
+    bench.add_argument("inputs", nargs="*", help="Sequenzdateien oder Glob-Muster")
+    bench.add_argument("--engines", help="Kommagetrennte Engines (Standard: alle, bei Dateien ohne 'classic')")
+    bench.add_argument("--repeat", type=_positive, default=3, help="Wiederholungen, gemessen wird die schnellste")
+    suite = bench.add_argument_group("Benchmark-Suite (ohne Modell)")
+    suite.add_argument("--states", default="2,8,32", help="Anzahl der Zustände N (Standard: 2,8,32)")
+    suite.add_argument("--lengths", default="1e3,1e4,1e5", help="Sequenzlängen T (Standard: 1e3,1e4,1e5)")
+    suite.add_argument("--symbols", default="6", help="Alphabetgrößen M (Standard: 6)")
+    suite.add_argument("--sparsity", default="0", help="Anteile fehlender Übergänge (Standard: 0)")
+    suite.add_argument("--numeric-modes", default="log", help="Zahlendarstellungen (Standard: log)")
+    suite.add_argument("--seed", type=int, default=0, help="Startwert für Modelle und Sequenzen")
+    suite.add_argument("--max-work", type=float, default=5e7,
+                       help="Python-Engines überspringen, wenn T·N² größer ist (0 → keine Grenze)")
+    suite.add_argument("--timeout", type=float, help="Zeitlimit pro Messung in Sekunden")
+    suite.add_argument("--in-process", action="store_true",
+                       help="Im aktuellen Prozess messen (schneller, Spitzen-RSS dann kumulativ)")
+    suite.add_argument("--json", help="Ergebnisse und Skalierungskurven als JSON speichern")
+    suite.add_argument("--csv", help="Ergebnisse als CSV speichern")
+    suite.add_argument("--baseline", help="Frühere JSON-Ausgabe; langsamere Messungen gelten als Regression")
+    suite.add_argument("--tolerance", type=float, default=0.2,
+                       help="Erlaubte Verlangsamung gegenüber --baseline (Standard: 0.2 = 20 %%)")
+    bench.set_defaults(handler=cmd_bench)
+
+    serve = commands.add_parser("serve", parents=[common], help="Lokalen Dekodier-Dienst starten")
+    serve.add_argument("--host", default="127.0.0.1", help="Adresse (Standard: 127.0.0.1)")
+    serve.add_argument("--port", type=_not_negative, default=8765, help="TCP-Port (Standard: 8765, 0 → frei)")
+    serve.add_argument("--unix", help="Unix-Socket statt TCP")
+    serve.add_argument("--workers", type=_not_negative, default=1,
+                       help="Prozesse für die Dekodierung (0 → im Server-Prozess, Standard: 1)")
+    serve.add_argument("--max-models", type=_positive, default=8, help="Modelle im Cache (Standard: 8)")
+    serve.add_argument("--batch-window", type=float, default=5.0,
+                       help="Wartezeit in ms, um Anfragen zu einem Batch zusammenzufassen (Standard: 5)")
+    serve.add_argument("--max-batch", type=_positive, default=64, help="Höchstens so viele Anfragen pro Batch")
+    serve.add_argument("--model-dir", help="Nur Modelle aus diesem Verzeichnis zulassen (Pfade relativ dazu)")
+    serve.add_argument("--timeout", type=_not_negative, default=300,
+                       help="Sekunden bis eine Anfrage mit 504 abgebrochen wird (0 → ohne Grenze, Standard: 300)")
+    serve.set_defaults(handler=cmd_serve)
+    return parser
+
+
+def load_config(path: str, parser: argparse.ArgumentParser) -> dict:
+    """
+    Liest eine JSON-Konfiguration und setzt deren Werte als Standardwerte aller Unterbefehle.
+    Schlüssel entsprechen den Optionsnamen ("numeric-mode" oder "numeric_mode").
+    Angaben auf der Kommandozeile haben Vorrang.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError(f"Konfiguration '{path}' muss ein JSON-Objekt sein.")
+    config = {key.replace("-", "_"): value for key, value in config.items()}
+
+    commands = next(action for action in parser._actions if isinstance(action, argparse._SubParsersAction))
+    known = set()
+    for command in commands.choices.values():
+        defaults = {}
+        for action in command._actions:
+            if action.dest in config:
+                defaults[action.dest] = _config_value(path, action, config[action.dest])
+        known |= {action.dest for action in command._actions}
+        command.set_defaults(**defaults)
+    unknown = sorted(set(config) - known - {"config", "help"})
+    if unknown:
+        raise ValueError(f"Unbekannte Optionen in '{path}': {', '.join(unknown)}")
+    return config
+
+
+def _config_value(path: str, action: argparse.Action, value):
+    """Prüft einen Konfigurationswert wie argparse einen Kommandozeilenwert (type und choices)."""
+    name = action.option_strings[-1] if action.option_strings else action.dest
+    if isinstance(action, (argparse._StoreTrueAction, argparse._StoreFalseAction)):
+        if not isinstance(value, bool):
+            raise ValueError(f"Konfiguration '{path}': '{name}' erwartet true oder false, nicht {value!r}.")
+        return value
+    if value is None:
+        return None
+    if action.type is not None:
+        try:
+            value = action.type(str(value))
+        except (TypeError, ValueError, argparse.ArgumentTypeError) as e:
+            raise ValueError(f"Konfiguration '{path}': ungültiger Wert {value!r} für '{name}' ({e}).")
+    elif not isinstance(value, str):
+        raise ValueError(f"Konfiguration '{path}': '{name}' erwartet eine Zeichenkette, nicht {value!r}.")
+    if action.choices is not None and value not in action.choices:
+        raise ValueError(f"Konfiguration '{path}': ungültiger Wert {value!r} für '{name}' "
+                         f"(erlaubt: {', '.join(map(str, action.choices))}).")
+    return value
+
+
+def run(argv: Optional[Sequence[str]] = None) -> int:
+    """Einstiegspunkt der Kommandozeile; gibt den Exit-Code zurück."""
+    argv = list(sys.argv[1:] if argv is None else argv)
+    parser = build_parser()
+
+    # --config zuerst auswerten, damit die Werte als Standardwerte gelten
+    pre = argparse.ArgumentParser(add_help=False)
+    pre.add_argument("--config")
+    known, _ = pre.parse_known_args(argv)
+    try:
+        if known.config:
+            load_config(known.config, parser)
+        args = parser.parse_args(argv)
+        return args.handler(args)
+    except BrokenPipeError:
+        # Ausgabe wurde vorzeitig geschlossen (z. B. "| head")
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    except (OSError, ValueError, ImportError) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
@@ -0,0 +1,321 @@
+import hashlib
+import json
+import math
+from array import array
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy ist optional und wird nur für die vektorisierten Engines benötigt
+    np = None
+
+
+# Namen der Wahrscheinlichkeitstabellen (normal und logarithmisch)
+TABLE_NAMES = ("start", "transitions", "emissions", "start_log", "transitions_log", "emissions_log")
+
+
+def index_typecode(count: int) -> str:
+    """
+    Liefert den kleinsten array-Typcode, mit dem sich Indizes 0..count-1 speichern lassen
+    (uint8 für bis zu 256 Werte, sonst uint16 bzw. uint32).
+    """
+    if count <= 1 << 8:
+        return "B"
+    if count <= 1 << 16:
+        return "H"
+    return "L"
+
+
+def index_array(count: int, length: int) -> array:
+    """Erzeugt ein mit 0 gefülltes Index-Array der Länge length für Werte 0..count-1."""
+    typecode = index_typecode(count)
+    return array(typecode, bytes(length * array(typecode).itemsize))
+
+
+class CompiledHMM:
+    """
+    Array-basierte Darstellung eines HMM.
+
+    Zustände und Symbole werden auf ganzzahlige Indizes abgebildet, Start-, Übergangs-
+    und Emissionswahrscheinlichkeiten liegen als zusammenhängende double-Arrays vor –
+    einmal normal und einmal im Logarithmus. Die Logarithmen werden nur einmal beim
+    Kompilieren berechnet und nicht bei jedem Zugriff.
+
+    Layout (zeilenweise):
+    - start[i]                   = P(Start = Zustand i)
+    - transitions[i * N + j]     = P(Zustand i → Zustand j)
+    - emissions[i * M + k]       = P(Zustand i erzeugt Symbol k)
+
+    Im HMM fehlende Einträge (z. B. ein Zustand ohne Eintrag für ein Symbol) stehen in den
+    Tabellen als 0; die Getter lösen dafür wie beim HMM einen Fehler aus (KeyError bzw. ValueError).
+    """
+
+    def __init__(self, hmm):
+        # Zustände und Symbole auf Indizes abbilden
+        self.states: List[str] = list(hmm.states)
+        self.state_index: Dict[str, int] = {state: i for i, state in enumerate(self.states)}
+
+        # Alphabet: alle Symbole, die in irgendeiner Emissionszeile vorkommen (in Reihenfolge des Auftretens)
+        emission_rows = [hmm.get_emission_row(state) for state in self.states]
+        self.symbols: List[str] = []
+        for row in emission_rows:
+            for symbol in row:
+                if symbol not in self.symbols:
+                    self.symbols.append(symbol)
+        self.symbol_index: Dict[str, int] = {symbol: k for k, symbol in enumerate(self.symbols)}
+
+        self.n_states = len(self.states)
+        self.n_symbols = len(self.symbols)
+
+        # Tabellen in normaler Darstellung
+        self.start = array("d", (hmm.get_start_prob_normal(state) for state in self.states))
+
+        # Positionen der im HMM nicht angegebenen Einträge (für die Getter)
+        self._undefined_transitions = set()
+        self._undefined_emissions = set()
+
+        self.transitions = array("d", bytes(8 * self.n_states * self.n_states))
+        for i, from_state in enumerate(self.states):
+            row = hmm.get_transition_row(from_state)
+            for j, to_state in enumerate(self.states):
+                if to_state in row:
+                    self.transitions[i * self.n_states + j] = row[to_state]
+                else:
+                    self._undefined_transitions.add(i * self.n_states + j)
+
+        self.emissions = array("d", bytes(8 * self.n_states * self.n_symbols))
+        for i, row in enumerate(emission_rows):
+            for symbol, prob in row.items():
+                self.emissions[i * self.n_symbols + self.symbol_index[symbol]] = prob
+            for k, symbol in enumerate(self.symbols):
+                if symbol not in row:
+                    self._undefined_emissions.add(i * self.n_symbols + k)
+
+        # Log-Tabellen einmalig berechnen
+        self.start_log = self._log_table(self.start)
+        self.transitions_log = self._log_table(self.transitions)
+        self.emissions_log = self._log_table(self.emissions)
+
+        # Zwischenspeicher für Spalten- und Adjazenzansichten (werden bei Bedarf erzeugt)
+        self._view_cache: Dict[Tuple[str, bool], list] = {}
+        self._fingerprint = None
+
+    @classmethod
+    def from_tables(cls, states: Sequence[str], symbols: Sequence[str], start, transitions, emissions,
+                    start_log=None, transitions_log=None, emissions_log=None) -> "CompiledHMM":
+        """
+        Baut ein CompiledHMM direkt aus fertigen Tabellen im obigen Layout (z. B. beim Laden
+        aus einer Binärdatei). Die Tabellen können array('d')-Objekte oder memoryviews sein
+        und werden nicht kopiert. Fehlende Log-Tabellen werden berechnet.
+        """
+        n, m = len(states), len(symbols)
+        if len(start) != n or len(transitions) != n * n or len(emissions) != n * m:
+            raise ValueError("Tabellengrößen passen nicht zur Anzahl der Zustände und Symbole.")
+
+        model = cls.__new__(cls)
+        model.states = list(states)
+        model.state_index = {state: i for i, state in enumerate(model.states)}
+        model.symbols = list(symbols)
+        model.symbol_index = {symbol: k for k, symbol in enumerate(model.symbols)}
+        model.n_states = n
+        model.n_symbols = m
+        model.start, model.transitions, model.emissions = start, transitions, emissions
+        model.start_log = start_log if start_log is not None else cls._log_table(start)
+        model.transitions_log = transitions_log if transitions_log is not None else cls._log_table(transitions)
+        model.emissions_log = emissions_log if emissions_log is not None else cls._log_table(emissions)
+        model._undefined_transitions = set()
+        model._undefined_emissions = set()
+        model._view_cache = {}
+        model._fingerprint = None
+        return model
+
+    def compile(self) -> "CompiledHMM":
+        """Ein kompiliertes HMM ist bereits kompiliert."""
+        return self
+
+    def fingerprint(self) -> str:
+        """
+        Eindeutiger Hash des Modells (Zustände, Symbole und Wahrscheinlichkeiten), z. B. als
+        Schlüssel für Caches. Wird einmal berechnet und danach zwischengespeichert.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(json.dumps([self.states, self.symbols], ensure_ascii=False).encode("utf-8"))
+            for table in (self.start, self.transitions, self.emissions):
+                digest.update(memoryview(table).cast("B"))
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def to_hmm(self):
+        """Wandelt das Modell zurück in ein HMM mit Dictionaries (vollständige Matrizen)."""
+        from src.hidden_markov_model import HMM
+        n, m = self.n_states, self.n_symbols
+        return HMM(
+            list(self.states),
+            {state: self.start[i] for i, state in enumerate(self.states)},
+            {state: {to_state: self.transitions[i * n + j] for j, to_state in enumerate(self.states)}
+             for i, state in enumerate(self.states)},
+            {state: {symbol: self.emissions[i * m + k] for k, symbol in enumerate(self.symbols)}
+             for i, state in enumerate(self.states)},
+        )
+
+    def __getstate__(self):
+        """
+        Für pickle (z. B. Übergabe an Worker-Prozesse): aus einer Datei abgebildete
+        Tabellen (memoryviews) werden dabei in eigene Arrays kopiert.
+        """
+        state = dict(self.__dict__)
+        for name in TABLE_NAMES:
+            if not isinstance(state[name], array):
+                state[name] = array("d", state[name])
+        state["_view_cache"] = {}
+        return state
+
+    @staticmethod
+    def _log_table(values: array) -> array:
+        """Rechnet eine Tabelle in Logarithmen um (0 oder kleiner → -∞), wie HMM._to_log."""
+        neg_inf = float("-inf")
+        return array("d", (math.log(v) if v > 0.0 else neg_inf for v in values))
+
+    # ---------- Kodierung ----------
+    def encode(self, observations: Iterable[str]) -> array:
+        """
+        Übersetzt eine Beobachtungssequenz in ein kompaktes Array von Symbol-Indizes.
+        Unbekannte Symbole führen zu einem ValueError.
+        """
+        index = self.symbol_index
+        try:
+            return array(index_typecode(self.n_symbols), [index[symbol] for symbol in observations])
+        except KeyError as e:
+            raise ValueError(f"Symbol {e} nicht im Emissionsmodell enthalten.")
+
+    def encode_states(self, states: Iterable[str]) -> array:
+        """Übersetzt eine Zustandsfolge in ein Array von Zustands-Indizes."""
+        index = self.state_index
+        try:
+            return array(index_typecode(self.n_states), [index[state] for state in states])
+        except KeyError as e:
+            raise ValueError(f"Unbekannter Zustand: {e}")
+
+    def state_names(self, indices: Sequence[int]) -> List[str]:
+        """Übersetzt Zustands-Indizes zurück in Zustandsnamen."""
+        states = self.states
+        return [states[i] for i in indices]
+
+    def symbol_names(self, indices: Sequence[int]) -> List[str]:
+        """Übersetzt Symbol-Indizes zurück in Symbole."""
+        symbols = self.symbols
+        return [symbols[k] for k in indices]
+
+    # ---------- Getter (gleiche Schnittstelle wie HMM) ----------
+    def get_emission_row(self, state: str) -> dict:
+        """Gibt die Emissionswahrscheinlichkeiten für einen Zustand zurück."""
+        offset = self.state_index[state] * self.n_symbols
+        return {symbol: self.emissions[offset + k] for k, symbol in enumerate(self.symbols)
+                if offset + k not in self._undefined_emissions}
+
+    def get_transition_row(self, state: str) -> dict:
+        """Gibt die Übergangswahrscheinlichkeiten vom angegebenen Zustand zu allen anderen Zuständen zurück."""
+        offset = self.state_index[state] * self.n_states
+        return {to_state: self.transitions[offset + j] for j, to_state in enumerate(self.states)
+                if offset + j not in self._undefined_transitions}
+
+    def get_start_prob_normal(self, state: str) -> float:
+        """Gibt die Startwahrscheinlichkeit für einen Zustand zurück (normaler Wert, nicht im Log)."""
+        return self.start[self.state_index[state]]
+
+    def get_transition_prob_normal(self, from_state: str, to_state: str) -> float:
+        """Gibt die Übergangswahrscheinlichkeit von einem Zustand zu einem anderen zurück (normaler Wert)."""
+        return self.transitions[self._transition_index(from_state, to_state)]
+
+    def get_emission_prob_normal(self, state: str, symbol: str) -> float:
+        """Gibt die Emissionswahrscheinlichkeit zurück, ein Symbol in einem Zustand zu beobachten."""
+        return self.emissions[self._emission_index(state, symbol)]
+
+    def get_start_prob_log(self, state: str) -> float:
+        """Gibt die vorberechnete Startwahrscheinlichkeit im Logarithmus zurück."""
+        return self.start_log[self.state_index[state]]
+
+    def get_transition_prob_log(self, from_state: str, to_state: str) -> float:
+        """Gibt die vorberechnete Übergangswahrscheinlichkeit im Logarithmus zurück."""
+        return self.transitions_log[self._transition_index(from_state, to_state)]
+
+    def get_emission_prob_log(self, state: str, symbol: str) -> float:
+        """Gibt die vorberechnete Emissionswahrscheinlichkeit im Logarithmus zurück."""
+        return self.emissions_log[self._emission_index(state, symbol)]
+
+    def _transition_index(self, from_state: str, to_state: str) -> int:
+        """Hilfsmethode: Position eines Übergangs; KeyError wie im HMM, falls er nicht angegeben ist."""
+        index = self.state_index[from_state] * self.n_states + self.state_index[to_state]
+        if index in self._undefined_transitions:
+            raise KeyError(to_state)
+        return index
+
+    def _emission_index(self, state: str, symbol: str) -> int:
+        """Hilfsmethode: Position einer Emission; Fehler wie im HMM, falls das Symbol unbekannt ist."""
+        code = self.symbol_index.get(symbol)
+        row = self.state_index.get(state)
+        index = None if code is None or row is None else row * self.n_symbols + code
+        if index is None or index in self._undefined_emissions:
+            raise ValueError(f"Symbol '{symbol}' nicht im Emissionsmodell für Zustand '{state}' enthalten.")
+        return index
+
+    # ---------- NumPy-Ansichten ----------
+    def numpy_tables(self, use_log: bool):
+        """
+        Gibt Start-, Übergangs- und Emissionstabelle als NumPy-Arrays der Form
+        (N,), (N, N) und (N, M) zurück. Die Arrays teilen sich den Speicher mit
+        den internen Tabellen (keine Kopie).
+        """
+        if np is None:
+            raise ImportError("Für diese Funktion wird NumPy benötigt (pip install numpy).")
+        if use_log:
+            start, transitions, emissions = self.start_log, self.transitions_log, self.emissions_log
+        else:
+            start, transitions, emissions = self.start, self.transitions, self.emissions
+        n, m = self.n_states, self.n_symbols
+        return (
+            np.frombuffer(start, dtype=np.float64),
+            np.frombuffer(transitions, dtype=np.float64).reshape(n, n),
+            np.frombuffer(emissions, dtype=np.float64).reshape(n, m),
+        )
+
+    # ---------- Zeilen-/Spaltenansichten für innere Schleifen ----------
+    def transition_columns(self, use_log: bool) -> List[List[float]]:
+        """
+        Liefert die Übergangsmatrix spaltenweise als Listen:
+        columns[j][i] = P(Zustand i → Zustand j) (bzw. der Logarithmus davon).
+        """
+        key = ("transitions", use_log)
+        if key not in self._view_cache:
+            table = self.transitions_log if use_log else self.transitions
+            n = self.n_states
+            self._view_cache[key] = [list(table[j::n]) for j in range(n)]
+        return self._view_cache[key]
+
+    def emission_columns(self, use_log: bool) -> List[List[float]]:
+        """
+        Liefert die Emissionsmatrix spaltenweise als Listen:
+        columns[k][i] = P(Zustand i erzeugt Symbol k) (bzw. der Logarithmus davon).
+        """
+        key = ("emissions", use_log)
+        if key not in self._view_cache:
+            table = self.emissions_log if use_log else self.emissions
+            m = self.n_symbols
+            self._view_cache[key] = [list(table[k::m]) for k in range(m)]
+        return self._view_cache[key]
+
+    def successors(self, use_log: bool) -> List[List[Tuple[int, float]]]:
+        """
+        Dünnbesetzte Übergänge: successors[i] enthält (j, P(i → j)) (bzw. den Logarithmus)
+        nur für Übergänge mit Wahrscheinlichkeit > 0, aufsteigend nach j.
+        """
+        key = ("successors", use_log)
+        if key not in self._view_cache:
+            table = self.transitions_log if use_log else self.transitions
+            n = self.n_states
+            self._view_cache[key] = [
+                [(j, table[i * n + j]) for j in range(n) if self.transitions[i * n + j] > 0.0]
+                for i in range(n)
+            ]
+        return self._view_cache[key]
@@ -0,0 +1,83 @@
+import hashlib
+import sys
+from array import array
+from collections import OrderedDict
+from typing import Optional, Sequence, Tuple
+
+# Geschätzter Verwaltungsaufwand pro Eintrag (Schlüssel, Tupel, Dictionary-Eintrag) in Bytes
+_ENTRY_OVERHEAD = 256
+
+
+class DecodeCache:
+    """
+    LRU-Cache für Dekodierergebnisse mit Speicherbudget.
+
+    Schlüssel: Fingerabdruck des Modells, Einstellungen des Decoders und Hash der kodierten
+    Sequenz. Gespeichert werden Pfad (Index-Array) und Log-Wahrscheinlichkeit. Übersteigt
+    der Speicherbedarf max_bytes, werden die am längsten nicht verwendeten Einträge
+    verworfen; Einträge, die allein größer als das Budget sind, werden nicht gespeichert.
+
+    Verwendung: ViterbiDecoder(hmm, engine="backpointer", cache=DecodeCache(64 * 2**20)).
+    Ein Cache kann von mehreren Decodern (auch mit verschiedenen Modellen) geteilt werden.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        if max_bytes < 0:
+            raise ValueError("max_bytes darf nicht negativ sein.")
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[tuple, Tuple[array, float, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(model, settings: dict, codes: Sequence[int]) -> tuple:
+        """Schlüssel aus Modell-Fingerabdruck, Decoder-Einstellungen und Sequenz-Hash."""
+        try:
+            data = memoryview(codes)
+        except TypeError:
+            data = memoryview(array("L", codes))
+        digest = hashlib.blake2b(data.cast("B"), digest_size=16)
+        digest.update(data.format.encode("ascii"))
+        # Die Anzahl der Prozesse ändert das Ergebnis nicht (bei "parallel" höchstens die Wahl unter
+        # gleich guten Pfaden) und würde den Cache nur aufteilen
+        settings = tuple(sorted((name, value) for name, value in settings.items() if name != "workers"))
+        return model.fingerprint(), settings, len(codes), digest.hexdigest()
+
+    def get(self, key: tuple) -> Optional[Tuple[array, float]]:
+        """Liefert (Pfad, Log-Wahrscheinlichkeit) oder None; ein Treffer wird als zuletzt verwendet markiert."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0], entry[1]
+
+    def put(self, key: tuple, path: array, log_probability: float):
+        """Speichert ein Ergebnis und verwirft bei Bedarf die ältesten Einträge."""
+        size = sys.getsizeof(path) + _ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self.nbytes -= self._entries.pop(key)[2]
+        self._entries[key] = (path, log_probability, size)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self.nbytes -= evicted
+            self.evictions += 1
+
+    def clear(self):
+        """Leert den Cache (die Statistik bleibt erhalten)."""
+        self._entries.clear()
+        self.nbytes = 0
+
+    def summary(self) -> str:
+        """Kurze, lesbare Zusammenfassung."""
+        return (f"{len(self._entries)} Einträge, {self.nbytes / 1024:.1f} von {self.max_bytes / 1024:.1f} KiB, "
+                f"{self.hits} Treffer, {self.misses} Fehlzugriffe, {self.evictions} verdrängt")
@@ -0,0 +1,109 @@
+import http.client
+import json
+import socket
+from typing import Optional, Sequence, Union
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP-Verbindung über einen Unix-Socket statt TCP."""
+
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+class DecodeClient:
+    """
+    Client für den lokalen Dekodier-Dienst (src/decode_server.py).
+
+        client = DecodeClient(port=8765)
+        result = client.decode("modell.bin", "3166466...")
+        print(result["path"], result["log_probability"])
+
+    Die Verbindung bleibt zwischen Anfragen offen (Keep-Alive). Ein Client ist nicht
+    threadsicher; für parallele Anfragen wird pro Thread ein eigener Client verwendet.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, unix_path: Optional[str] = None,
+                 timeout: Optional[float] = 60.0):
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.timeout = timeout
+        self._connection: Optional[http.client.HTTPConnection] = None
+
+    def decode(self, model: str, observations: Union[str, Sequence[str]], engine: str = "backpointer",
+               numeric_mode: str = "log") -> dict:
+        """Viterbi-Dekodierung: {"path": [...], "log_probability": ...}."""
+        return self._request("POST", "/decode", {
+            "model": model, "observations": self._observations(observations),
+            "engine": engine, "numeric_mode": numeric_mode,
+        })
+
+    def posterior(self, model: str, observations: Union[str, Sequence[str]], engine: str = "python",
+                  posteriors: bool = False) -> dict:
+        """Posterior-Dekodierung: {"path": [...], "log_likelihood": ...} und optional alle Posteriors."""
+        return self._request("POST", "/posterior", {
+            "model": model, "observations": self._observations(observations),
+            "engine": engine, "posteriors": posteriors,
+        })
+
+    def metrics(self) -> dict:
+        """Kennzahlen des Servers (Latenz, Durchsatz, Batch-Größen, Modell-Cache)."""
+        return self._request("GET", "/metrics")
+
+    def health(self) -> dict:
+        """{"status": "ok"}, wenn der Server erreichbar ist."""
+        return self._request("GET", "/health")
+
+    def close(self):
+        """Schließt die Verbindung."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self) -> "DecodeClient":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # ---------- Interne Hilfsmethoden ----------
+    @staticmethod
+    def _observations(observations: Union[str, Sequence[str]]):
+        """Zeichenketten werden unverändert gesendet (ein Zeichen pro Symbol), sonst als Liste."""
+        return observations if isinstance(observations, str) else [str(symbol) for symbol in observations]
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self._connection is None:
+            if self.unix_path is not None:
+                self._connection = _UnixHTTPConnection(self.unix_path, timeout=self.timeout)
+            else:
+                self._connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return self._connection
+
+    def _request(self, method: str, route: str, payload: Optional[dict] = None) -> dict:
+        """Sendet eine Anfrage; eine vom Server geschlossene Verbindung wird einmal neu aufgebaut."""
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        for attempt in range(2):
+            connection = self._connect()
+            try:
+                connection.request(method, route, body=body, headers=headers)
+                response = connection.getresponse()
+                data = json.loads(response.read().decode("utf-8"))
+                break
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                self.close()
+                if attempt == 1:
+                    raise
+        if response.status >= 500:
+            raise RuntimeError(f"Serverfehler ({response.status}): {data.get('error')}")
+        if response.status >= 400:
+            raise ValueError(data.get("error", f"Fehler {response.status}"))
+        return data
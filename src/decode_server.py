@@ -0,0 +1,530 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+from src.batch_decoder import decode_batch_encoded
+from src.compiled_hmm import CompiledHMM
+from src.model_io import load_model
+from src.posterior_decoder import PosteriorDecoder
+from src.viterbi_decoder import ViterbiDecoder
+
+try:
+    import numpy as np
+except ImportError:  # NumPy ist optional; ohne NumPy werden Batches Sequenz für Sequenz dekodiert
+    np = None
+
+# Größte erlaubte Anfrage (JSON-Body) in Bytes
+MAX_BODY = 256 * 1024 * 1024
+# Anzahl der letzten Anfragen, aus denen die Latenz-Perzentile berechnet werden
+LATENCY_WINDOW = 1000
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error", 504: "Gateway Timeout"}
+
+
+# =============================
+# Modell-Cache
+# =============================
+
+class ModelCache:
+    """
+    LRU-Cache für kompilierte Modelle. Schlüssel ist der Dateipfad zusammen mit Änderungszeit
+    und Größe der Datei, damit eine geänderte Datei automatisch neu geladen wird.
+    Threadsicher: Bei workers=0 teilen sich Server und Dekodier-Threads denselben Cache.
+    """
+
+    def __init__(self, max_models: int = 8):
+        if max_models < 1:
+            raise ValueError("max_models muss mindestens 1 sein.")
+        self.max_models = max_models
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._models: "OrderedDict[tuple, CompiledHMM]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    @staticmethod
+    def key(path: str) -> tuple:
+        """(absoluter Pfad, Änderungszeit, Größe); FileNotFoundError, wenn die Datei fehlt."""
+        path = os.path.realpath(path)
+        stat = os.stat(path)
+        return path, stat.st_mtime_ns, stat.st_size
+
+    def get(self, key: tuple) -> CompiledHMM:
+        """Modell zum Schlüssel; wird bei Bedarf geladen und kompiliert (außerhalb der Sperre)."""
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self.hits += 1
+                self._models.move_to_end(key)
+                return model
+            self.misses += 1
+        model = load_model(key[0]).compile()
+        with self._lock:
+            self._models[key] = model
+            while len(self._models) > self.max_models:
+                self._models.popitem(last=False)
+                self.evictions += 1
+        return model
+
+    def summary(self) -> dict:
+        """Kennzahlen für /metrics."""
+        return {"models": len(self._models), "max_models": self.max_models, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+
+# =============================
+# Worker-Prozesse
+# =============================
+# Jeder Worker hält einen eigenen Modell-Cache; Modelle werden über ihren Schlüssel
+# (Pfad, Änderungszeit, Größe) referenziert und nur beim ersten Batch geladen.
+_worker_models: Optional[ModelCache] = None
+
+
+def _init_worker(max_models: int):
+    """Initializer der Worker-Prozesse."""
+    global _worker_models
+    _worker_models = ModelCache(max_models)
+
+
+def _run_batch(model_key: tuple, kind: str, settings: dict, batch: List) -> List[tuple]:
+    """
+    Führt einen Batch gleichartiger Anfragen aus (im Worker oder im Server-Prozess).
+    Fehler einzelner Anfragen werden als ("fehler", Meldung) bei ungültigen Eingaben bzw.
+    ("intern", Meldung) bei sonstigen Ausnahmen zurückgegeben, ohne den Batch abzubrechen.
+
+    Viterbi-Anfragen gleicher Länge werden mit NumPy gemeinsam dekodiert (decode_batch_encoded),
+    alle übrigen einzeln.
+    """
+    global _worker_models
+    if _worker_models is None:
+        _worker_models = ModelCache()
+    model = _worker_models.get(model_key)
+    results: List[Optional[tuple]] = [None] * len(batch)
+
+    if kind == "decode":
+        decoder = ViterbiDecoder(model, **settings)
+        run = decoder.decode_encoded_with_log_probability
+        # Beam- und Top-K-Pruning sind Näherungen und werden daher nicht gemeinsam dekodiert
+        if np is not None and settings["beam_width"] is None and settings["top_k"] is None:
+            _decode_same_length(decoder, batch, results)
+    else:
+        keep_posteriors = settings["posteriors"]
+        decoder = PosteriorDecoder(model, engine=settings["engine"])
+
+        def run(codes):
+            result = decoder.analyze_encoded(codes, keep_posteriors)
+            return result.path, result.log_likelihood, result.posteriors
+
+    for index, codes in enumerate(batch):
+        if results[index] is not None:
+            continue
+        try:
+            results[index] = ("ok", run(codes))
+        except (ValueError, ArithmeticError) as e:
+            results[index] = ("fehler", str(e))
+        except Exception as e:
+            results[index] = ("intern", f"{type(e).__name__}: {e}")
+    return results
+
+
+def _decode_same_length(decoder: ViterbiDecoder, batch: List, results: List[Optional[tuple]]):
+    """
+    Dekodiert Gruppen von mindestens zwei Sequenzen gleicher Länge gemeinsam und trägt
+    die Ergebnisse in results ein. Scheitert eine Gruppe (z. B. weil eine Sequenz keinen
+    gültigen Pfad hat), bleiben ihre Einträge leer und werden einzeln dekodiert, damit
+    nur die betroffene Anfrage einen Fehler erhält.
+    """
+    groups: Dict[int, List[int]] = {}
+    for index, codes in enumerate(batch):
+        groups.setdefault(len(codes), []).append(index)
+    for length, indices in groups.items():
+        if length == 0 or len(indices) < 2:
+            continue
+        try:
+            decoded = decode_batch_encoded(decoder, [batch[index] for index in indices])
+        except Exception:
+            continue
+        for index, result in zip(indices, decoded):
+            results[index] = ("ok", result)
+
+
+# =============================
+# Kennzahlen
+# =============================
+
+class ServerMetrics:
+    """Latenz, Durchsatz und Batch-Größen des Servers."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests: Dict[str, int] = {}
+        self.errors = 0
+        self.symbols = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.largest_batch = 0
+        self._latencies: Dict[str, deque] = {}
+
+    def record_request(self, kind: str, seconds: float, symbols: int, ok: bool):
+        """Eine beantwortete Anfrage."""
+        self.requests[kind] = self.requests.get(kind, 0) + 1
+        self.symbols += symbols
+        if not ok:
+            self.errors += 1
+        self._latencies.setdefault(kind, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def record_batch(self, size: int):
+        """Ein ausgeführter Batch mit size Anfragen."""
+        self.batches += 1
+        self.batched_requests += size
+        self.largest_batch = max(self.largest_batch, size)
+
+    @staticmethod
+    def _percentiles(values) -> dict:
+        """p50/p95/p99 und Maximum in Millisekunden."""
+        ordered = sorted(values)
+        if not ordered:
+            return {}
+
+        def at(fraction):
+            return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+        return {"p50_ms": at(0.50), "p95_ms": at(0.95), "p99_ms": at(0.99), "max_ms": ordered[-1] * 1000}
+
+    def snapshot(self) -> dict:
+        """Alle Kennzahlen als Dictionary."""
+        uptime = time.monotonic() - self.started
+        total = sum(self.requests.values())
+        return {
+            "uptime_s": uptime,
+            "requests": dict(self.requests),
+            "errors": self.errors,
+            "symbols": self.symbols,
+            "requests_per_second": total / uptime if uptime > 0 else 0.0,
+            "symbols_per_second": self.symbols / uptime if uptime > 0 else 0.0,
+            "batches": self.batches,
+            "mean_batch_size": self.batched_requests / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "latency": {kind: self._percentiles(values) for kind, values in self._latencies.items()},
+        }
+
+
+# =============================
+# Server
+# =============================
+
+class RequestError(Exception):
+    """Fehlerhafte Anfrage; wird mit dem angegebenen HTTP-Status beantwortet."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class DecodeServer:
+    """
+    Lokaler Dekodier-Dienst (HTTP/1.1 mit JSON über localhost-TCP oder einen Unix-Socket).
+
+    Endpunkte:
+      POST /decode     {"model": Pfad, "observations": [...] oder "16626...", "engine", "numeric_mode"}
+                       → {"path": [...], "log_probability": ...}
+      POST /posterior  {"model", "observations", "engine": "python"|"numpy", "posteriors": bool}
+                       → {"path": [...], "log_likelihood": ..., "states": [...], "posteriors": [[...], ...]}
+      GET  /metrics    Latenz, Durchsatz, Batch-Größen, Modell-Cache
+      GET  /health
+
+    Kompilierte Modelle bleiben in einem LRU-Cache (ModelCache) geladen. Gleichartige Anfragen
+    (gleiches Modell, gleiche Einstellungen), die innerhalb von batch_window Sekunden eintreffen,
+    werden zu einem Batch zusammengefasst und gemeinsam in einem Prozess-Pool ausgeführt
+    (workers=0 → im Server-Prozess, in einem Thread). Viterbi-Anfragen gleicher Länge eines
+    Batches werden dabei mit NumPy als eine 3-D-Array-Operation dekodiert (decode_batch_encoded).
+
+    Stürzt ein Worker-Prozess ab, erhalten die offenen Anfragen 500 und der Pool wird neu
+    gestartet. Liegt nach request_timeout Sekunden kein Ergebnis vor, wird die Anfrage mit
+    504 beantwortet (None → ohne Zeitgrenze).
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, unix_path: Optional[str] = None,
+                 workers: Optional[int] = 1, max_models: int = 8, batch_window: float = 0.005,
+                 max_batch: int = 64, max_batch_symbols: int = 1_000_000, model_dir: Optional[str] = None,
+                 request_timeout: Optional[float] = 300.0):
+        if max_batch < 1:
+            raise ValueError("max_batch muss mindestens 1 sein.")
+        if batch_window < 0:
+            raise ValueError("batch_window darf nicht negativ sein.")
+        if request_timeout is not None and request_timeout <= 0:
+            raise ValueError("request_timeout muss positiv sein (None → ohne Zeitgrenze).")
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.max_batch_symbols = max_batch_symbols
+        self.request_timeout = request_timeout
+        # Nur Modelle unterhalb dieses Verzeichnisses dürfen geladen werden (None → beliebige Pfade)
+        self.model_dir = os.path.realpath(model_dir) if model_dir is not None else None
+
+        self.models = ModelCache(max_models)
+        self.metrics = ServerMetrics()
+        self._pool = None
+        self._server = None
+        self._loop = None
+        # Offene Batches: Schlüssel → (Liste von (Codes, Future), Zeitgeber)
+        self._pending: Dict[tuple, Tuple[list, Optional[asyncio.TimerHandle]]] = {}
+
+    # ---------- Lebenszyklus ----------
+    async def start(self):
+        """Startet Worker-Pool und Server; bei port=0 wird ein freier Port gewählt (siehe address)."""
+        global _worker_models
+        self._loop = asyncio.get_running_loop()
+        if self.workers > 0:
+            self._pool = self._new_pool()
+        else:
+            # Batches laufen in Threads dieses Prozesses: denselben Modell-Cache verwenden
+            _worker_models = self.models
+        if self.unix_path is not None:
+            self._server = await asyncio.start_unix_server(self._handle_connection, path=self.unix_path)
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+
+    @property
+    def address(self) -> str:
+        """Adresse, unter der der Server erreichbar ist."""
+        return f"unix:{self.unix_path}" if self.unix_path is not None else f"http://{self.host}:{self.port}"
+
+    async def serve_forever(self):
+        """Startet den Server (falls nötig) und beantwortet Anfragen, bis er beendet wird."""
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        """Beendet Server und Worker-Pool."""
+        global _worker_models
+        if _worker_models is self.models:
+            _worker_models = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        if self.unix_path is not None and os.path.exists(self.unix_path):
+            os.unlink(self.unix_path)
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        """Neuer Worker-Pool; jeder Worker hält einen eigenen Modell-Cache."""
+        return ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.models.max_models,))
+
+    # ---------- HTTP ----------
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Beantwortet die Anfragen einer Verbindung (Keep-Alive wie bei HTTP/1.1 üblich)."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", "0"))
+                if length > MAX_BODY:
+                    status, payload = 413, {"error": f"Anfrage größer als {MAX_BODY} Bytes."}
+                    body = None
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self._dispatch(method, target.split("?")[0], body)
+
+                keep_alive = (version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                              and body is not None)
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            # Abgebrochene oder unlesbare Verbindung: ohne Antwort schließen
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, route: str, body: bytes) -> Tuple[int, dict]:
+        """Verteilt eine Anfrage auf den passenden Endpunkt."""
+        if route in ("/health", "/metrics"):
+            if method != "GET":
+                return 405, {"error": f"{route} erwartet GET."}
+            if route == "/health":
+                return 200, {"status": "ok"}
+            return 200, dict(self.metrics.snapshot(), model_cache=self.models.summary(),
+                             pending_batches=len(self._pending))
+        if route not in ("/decode", "/posterior"):
+            return 404, {"error": f"Unbekannter Endpunkt '{route}'."}
+        if method != "POST":
+            return 405, {"error": f"{route} erwartet POST."}
+
+        kind = route[1:]
+        started = time.perf_counter()
+        symbols = 0
+        try:
+            try:
+                request = json.loads(body.decode("utf-8"))
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                raise RequestError(400, f"Ungültiges JSON: {e}")
+            if not isinstance(request, dict):
+                raise RequestError(400, "Die Anfrage muss ein JSON-Objekt sein.")
+            model_key, model, settings, codes = await self._prepare(kind, request)
+            symbols = len(codes)
+            result = await self._submit(model_key, kind, settings, codes)
+            status, payload = 200, self._response(kind, model, settings, result)
+        except RequestError as e:
+            status, payload = e.status, {"error": str(e)}
+        except Exception as e:
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+        self.metrics.record_request(kind, time.perf_counter() - started, symbols, status == 200)
+        return status, payload
+
+    # ---------- Anfragen ----------
+    async def _prepare(self, kind: str, request: dict):
+        """
+        Prüft eine Anfrage, lädt das Modell (über den Cache) und kodiert die Beobachtungen.
+        Das Laden läuft in einem Thread, damit ein großes Modell andere Verbindungen nicht blockiert.
+        """
+        path = request.get("model")
+        if not isinstance(path, str):
+            raise RequestError(400, "Feld 'model' (Pfad zur Modelldatei) fehlt.")
+        if self.model_dir is not None:
+            path = os.path.join(self.model_dir, path)
+            if os.path.commonpath([self.model_dir, os.path.realpath(path)]) != self.model_dir:
+                raise RequestError(400, f"Modell '{request['model']}' liegt außerhalb des Modellverzeichnisses.")
+        try:
+            model_key = self.models.key(path)
+            model = await self._loop.run_in_executor(None, self.models.get, model_key)
+        except FileNotFoundError:
+            raise RequestError(404, f"Modell '{request['model']}' nicht gefunden.")
+        except ValueError as e:
+            raise RequestError(400, f"Modell '{request['model']}' konnte nicht geladen werden: {e}")
+
+        observations = request.get("observations")
+        if isinstance(observations, str):
+            observations = list(observations)
+        if not isinstance(observations, list):
+            raise RequestError(400, "Feld 'observations' (Liste von Symbolen oder Zeichenkette) fehlt.")
+        try:
+            codes = model.encode(str(symbol) for symbol in observations)
+            settings = self._settings(kind, model, request)
+        except (ValueError, ImportError) as e:
+            raise RequestError(400, str(e))
+        return model_key, model, settings, codes
+
+    @staticmethod
+    def _settings(kind: str, model: CompiledHMM, request: dict) -> dict:
+        """Einstellungen des Decoders; ungültige Werte führen zu einem ValueError."""
+        if kind == "decode":
+            # Der Decoder prüft Engine und Zahlendarstellung; in Workern wird wie bei decode_many
+            # "backpointer" statt der Lehrversion bzw. der selbst parallelen Engine verwendet
+            decoder = ViterbiDecoder(model, engine=request.get("engine", "backpointer"),
+                                     numeric_mode=request.get("numeric_mode", "log"))
+            settings = decoder.settings()
+            if settings["engine"] in ("classic", "parallel"):
+                settings["engine"] = "backpointer"
+            return settings
+        engine = request.get("engine", "python")
+        PosteriorDecoder(model, engine=engine)
+        return {"engine": engine, "posteriors": bool(request.get("posteriors", False))}
+
+    @staticmethod
+    def _response(kind: str, model: CompiledHMM, settings: dict, result) -> dict:
+        """JSON-Antwort aus dem Ergebnis eines Batch-Eintrags."""
+        if kind == "decode":
+            path, log_probability = result
+            return {"path": model.state_names(path), "log_probability": log_probability}
+        path, log_likelihood, posteriors = result
+        response = {"path": model.state_names(path), "log_likelihood": log_likelihood}
+        if settings["posteriors"]:
+            n = model.n_states
+            response["states"] = model.states
+            response["posteriors"] = [list(posteriors[t * n:(t + 1) * n]) for t in range(len(path))]
+        return response
+
+    # ---------- Micro-Batching ----------
+    async def _submit(self, model_key: tuple, kind: str, settings: dict, codes):
+        """Reiht eine Anfrage in den passenden Batch ein und wartet auf ihr Ergebnis."""
+        key = (model_key, kind, tuple(sorted(settings.items())))
+        future = self._loop.create_future()
+        entries, timer = self._pending.get(key, ([], None))
+        entries.append((codes, future))
+        if timer is None and self.batch_window > 0:
+            timer = self._loop.call_later(self.batch_window, self._flush, key)
+        self._pending[key] = (entries, timer)
+
+        if (len(entries) >= self.max_batch or self.batch_window == 0
+                or sum(len(c) for c, _ in entries) >= self.max_batch_symbols):
+            self._flush(key)
+
+        try:
+            status, value = await asyncio.wait_for(future, self.request_timeout)
+        except asyncio.TimeoutError:
+            raise RequestError(504, f"Kein Ergebnis nach {self.request_timeout:g} s "
+                                    f"(Worker-Prozess abgestürzt oder überlastet).")
+        if status == "intern":
+            raise RequestError(500, value)
+        if status != "ok":
+            raise RequestError(400, value)
+        return value
+
+    def _flush(self, key: tuple):
+        """Schickt die gesammelten Anfragen eines Schlüssels als einen Batch an die Worker."""
+        entries, timer = self._pending.pop(key, (None, None))
+        if not entries:
+            return
+        if timer is not None:
+            timer.cancel()
+        self.metrics.record_batch(len(entries))
+        model_key, kind, settings = key
+        arguments = (model_key, kind, dict(settings), [codes for codes, _ in entries])
+        futures = [future for _, future in entries]
+        pool = self._pool
+
+        def done(task: asyncio.Future):
+            error = task.exception()
+            if isinstance(error, BrokenProcessPool) and self._pool is pool:
+                # Ein Worker ist abgestürzt; der Pool nimmt keine Aufgaben mehr an und wird ersetzt
+                pool.shutdown(wait=False)
+                self._pool = self._new_pool()
+            for index, future in enumerate(futures):
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(task.result()[index])
+
+        # pool=None → Standard-Thread-Pool des Event-Loops (workers=0)
+        task = self._loop.run_in_executor(pool, _run_batch, *arguments)
+        task.add_done_callback(done)
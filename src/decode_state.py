@@ -0,0 +1,34 @@
+import sys
+from array import array
+from typing import List, Optional
+
+
+class DecodeState:
+    """
+    Fortsetzbarer Zustand einer Viterbi-Dekodierung (siehe ViterbiDecoder.start und extend).
+
+    Enthält die letzte Spalte der Trellis, die aufsummierten Log-Skalierungsfaktoren
+    (nur bei "scaled") und die kompakte Backpointer-Tabelle aller bisherigen Zeitschritte.
+    Wird eine Sequenz verlängert, muss nur die Rekursion über die neuen Symbole laufen.
+    """
+
+    def __init__(self, fingerprint: str, numeric_mode: str, backpointers: array):
+        self.fingerprint = fingerprint      # Modell, zu dem der Zustand gehört
+        self.numeric_mode = numeric_mode
+        self.column: Optional[List[float]] = None  # Spalte zum Zeitpunkt length-1
+        self.log_scale = 0.0
+        self.length = 0
+        # Backpointer für t = 1..length-1, zeilenweise: backpointers[(t - 1) * N + j]
+        self.backpointers = backpointers
+
+    @property
+    def nbytes(self) -> int:
+        """Ungefährer Speicherbedarf in Bytes."""
+        column = sys.getsizeof(self.column) + 24 * len(self.column) if self.column is not None else 0
+        return sys.getsizeof(self.backpointers) + column
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __repr__(self) -> str:
+        return f"DecodeState(length={self.length}, numeric_mode={self.numeric_mode!r})"
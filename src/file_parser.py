@@ -1,28 +1,71 @@
-from typing import Tuple, List
+import mmap
+from array import array
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+# Zeichen, die innerhalb einer Sequenzzeile ignoriert werden
+_WHITESPACE = b" \t\r"
+# Markierung für unbekannte Zeichen in der Übersetzungstabelle
+_UNKNOWN = 0xFF
+# Ein Präfix wie "zahlenfolge:" wird nur am Zeilenanfang gesucht
+_LABEL_WINDOW = 256
+
+
+class SequenceRecord:
+    """Ein Datensatz einer Sequenzdatei: Name, kodierte Beobachtungen und optional kodierte Zustände."""
+
+    def __init__(self, name: str, observations: array, states: Optional[array] = None):
+        self.name = name
+        self.observations = observations  # array('B') mit Symbol-Indizes
+        self.states = states              # array('B') mit Zustands-Indizes oder None
+
+    def __len__(self) -> int:
+        return len(self.observations)
+
+    def __repr__(self) -> str:
+        return f"SequenceRecord(name={self.name!r}, length={len(self.observations)})"
+
 
 class FileParser:
+    """
+    Einlesen von Beobachtungs- und Zustandsfolgen.
+
+    Dateiformat (ein Zeichen pro Symbol, Präfixe wie "zahlenfolge:" werden ignoriert):
+
+        >name_1
+        zahlenfolge: 5232261464...
+        wuerfel:     FFFFFFFFLL...
+        >name_2
+        ...
+
+    Jeder Datensatz beginnt mit einer Kopfzeile ">name", gefolgt von einer
+    Beobachtungszeile und optional einer Zustandszeile. Dateien ohne Kopfzeile
+    (z. B. data/wuerfel2025.txt) bestehen aus genau einem Datensatz ohne Namen.
+
+    iter_records und iter_chunks lesen die Datei über mmap und kodieren die Zeilen
+    direkt per bytes.translate in uint8-Arrays (1 Byte pro Symbol), ohne Listen
+    einzelner Zeichen anzulegen.
+    """
 
     @staticmethod
     def parse_file(filepath: str) -> Tuple[List[str], List[str]]:
         try:
-            # Datei öffnen und Zeilen einlesen
-            # Strip entfernt \n und Leerzeichen, leere Zeilen werden ignoriert
-            with open(filepath, "r", encoding="utf-8") as f:
-                lines = [line.strip() for line in f if line.strip()]
-                
+            with FileParser._mapped(filepath) as data:
+                # Nur der erste Datensatz wird gelesen
+                # Präfix wie bisher bis zum letzten Doppelpunkt der Zeile entfernen
+                for _, observations, states in FileParser._raw_records(data, label_window=None):
+                    break
+                else:
+                    observations = states = None
+
                 # Datei muss mindestens 2 Zeilen enthalten (Zahlen + Zustände)
-                if len(lines) < 2:
+                if observations is None or states is None:
                     raise ValueError("Die Datei muss mindestens zwei Zeilen enthalten: Zahlenfolge und Zustände.")
-                
-                # Erste Zeile: Nur den Teil nach dem Doppelpunkt nehmen (falls vorhanden)
-                zahlenfolge = lines[0].split(':')[-1].strip()
-                # In einzelne Zeichen (Zahlen) aufsplitten
-                observations = list(zahlenfolge)
 
-                # Zweite Zeile: Zustandsfolge extrahieren
-                zustandsfolge = lines[1].split(':')[-1].strip()
-                # In einzelne Zeichen (Zustände) aufsplitten
-                states = list(zustandsfolge)
+                # In einzelne Zeichen (Zahlen bzw. Zustände) aufsplitten; Leerzeichen innerhalb
+                # der Zeile bleiben wie bisher erhalten
+                observations = list(FileParser._text(data, observations))
+                states = list(FileParser._text(data, states))
 
                 # Sicherstellen, dass beide Folgen gleich lang sind
                 if len(observations) != len(states):
@@ -37,3 +80,172 @@ class FileParser:
         except Exception as e:
             # Allgemeiner Fehler beim Parsen
             raise IOError(f"Fehler beim Parsen der Datei '{filepath}': {e}")
+
+    @staticmethod
+    def iter_records(filepath: str, symbols: Sequence[str],
+                     states: Optional[Sequence[str]] = None) -> Iterator[SequenceRecord]:
+        """
+        Liefert die Datensätze einer Datei nacheinander (lazy).
+
+        - symbols: Symbolalphabet in Index-Reihenfolge (z. B. hmm.compile().symbols)
+        - states:  Zustandsalphabet (z. B. hmm.compile().states); None → Zustandszeilen werden übersprungen
+
+        Die Codes entsprechen damit direkt den Indizes des kompilierten Modells und
+        können an ViterbiDecoder.decode_encoded übergeben werden.
+        """
+        symbol_table = FileParser._translation_table(symbols)
+        state_table = FileParser._translation_table(states) if states is not None else None
+
+        with FileParser._mapped(filepath) as data:
+            for name, observation_span, state_span in FileParser._raw_records(data):
+                if observation_span is None:
+                    raise ValueError(f"Datensatz '{name}' enthält keine Beobachtungen.")
+                observations = FileParser._encode(data, observation_span, symbol_table, "Symbol")
+                state_codes = None
+                if state_table is not None and state_span is not None:
+                    state_codes = FileParser._encode(data, state_span, state_table, "Zustand")
+                    if len(state_codes) != len(observations):
+                        raise ValueError(f"Datensatz '{name}': Zahlenfolge und Zustandsfolge haben "
+                                         f"unterschiedliche Längen.")
+                yield SequenceRecord(name, observations, state_codes)
+
+    @staticmethod
+    def iter_chunks(filepath: str, symbols: Sequence[str],
+                    chunk_size: int = 1 << 20) -> Iterator[Tuple[str, array]]:
+        """
+        Liefert die Beobachtungen aller Datensätze in Stücken von höchstens chunk_size
+        Symbolen als (Name, Codes). Ein Stück gehört immer zu genau einem Datensatz;
+        Zustandszeilen werden übersprungen. Der Speicherbedarf ist unabhängig von der
+        Dateigröße, z. B. für StreamingViterbiDecoder.decode_encoded_stream.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size muss mindestens 1 sein.")
+        table = FileParser._translation_table(symbols)
+
+        with FileParser._mapped(filepath) as data:
+            for name, observation_span, _ in FileParser._raw_records(data):
+                if observation_span is None:
+                    raise ValueError(f"Datensatz '{name}' enthält keine Beobachtungen.")
+                start, end = observation_span
+                for chunk_start in range(start, end, chunk_size):
+                    span = (chunk_start, min(chunk_start + chunk_size, end))
+                    codes = FileParser._encode(data, span, table, "Symbol")
+                    if codes:
+                        yield name, codes
+
+    # ---------- Interne Hilfsmethoden ----------
+    @staticmethod
+    @contextmanager
+    def _mapped(filepath: str):
+        """Bildet die Datei schreibgeschützt in den Speicher ab (leere Dateien → b"")."""
+        with open(filepath, "rb") as f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Leere Dateien lassen sich nicht abbilden
+                yield b""
+                return
+            try:
+                yield data
+            finally:
+                data.close()
+
+    @staticmethod
+    def _lines(data) -> Iterator[Tuple[int, int]]:
+        """Liefert (Anfang, Ende) aller nicht leeren Zeilen, ohne sie zu kopieren."""
+        size = len(data)
+        position = 0
+        while position < size:
+            end = data.find(b"\n", position)
+            if end == -1:
+                end = size
+            # Führende und abschließende Leerzeichen überspringen
+            start = position
+            while start < end and data[start] in _WHITESPACE:
+                start += 1
+            stop = end
+            while stop > start and data[stop - 1] in _WHITESPACE:
+                stop -= 1
+            if start < stop:
+                yield start, stop
+            position = end + 1
+
+    @staticmethod
+    def _raw_records(data, label_window: Optional[int] = _LABEL_WINDOW
+                     ) -> Iterator[Tuple[str, Optional[Tuple[int, int]], Optional[Tuple[int, int]]]]:
+        """
+        Zerlegt die Datei in Datensätze: (Name, Bereich der Beobachtungen, Bereich der Zustände).
+        Die Bereiche verweisen in die abgebildete Datei, ein Präfix "...:" ist bereits entfernt;
+        der Doppelpunkt wird nur in den ersten label_window Bytes gesucht (None → ganze Zeile).
+        Weitere Zeilen sind nur bei Datensätzen mit Kopfzeile (">Name") ein Fehler; ohne
+        Kopfzeile werden sie wie im ursprünglichen Einzelformat ignoriert.
+        """
+        name = None
+        spans: List[Tuple[int, int]] = []
+        for start, end in FileParser._lines(data):
+            if data[start] == ord(">"):
+                if name is not None or spans:
+                    yield FileParser._finish_record(name, spans)
+                name = bytes(data[start + 1:end]).decode("utf-8").strip()
+                spans = []
+                continue
+
+            if len(spans) == 2:
+                if name is None:
+                    # Altes Format ohne Kopfzeile: wie bisher zählen nur die ersten beiden Zeilen
+                    continue
+                raise ValueError(f"Datensatz '{name}' enthält mehr als zwei Zeilen "
+                                 f"(erwartet: Zahlenfolge und Zustände).")
+            # Präfix wie "zahlenfolge:" entfernen
+            window_end = end if label_window is None else min(end, start + label_window)
+            colon = data.rfind(b":", start, window_end)
+            if colon != -1:
+                start = colon + 1
+                while start < end and data[start] in _WHITESPACE:
+                    start += 1
+            spans.append((start, end))
+
+        if name is not None or spans:
+            yield FileParser._finish_record(name, spans)
+
+    @staticmethod
+    def _finish_record(name: Optional[str], spans: List[Tuple[int, int]]):
+        """Baut das Tupel eines Datensatzes aus den gesammelten Zeilenbereichen."""
+        observations = spans[0] if len(spans) > 0 else None
+        states = spans[1] if len(spans) > 1 else None
+        return name or "", observations, states
+
+    @staticmethod
+    def _translation_table(alphabet: Sequence[str]) -> bytes:
+        """Übersetzungstabelle Byte → Index für bytes.translate (unbekannte Zeichen → 0xFF)."""
+        if len(alphabet) >= _UNKNOWN:
+            raise ValueError(f"Höchstens {_UNKNOWN - 1} verschiedene Zeichen werden unterstützt.")
+        table = bytearray([_UNKNOWN]) * 256
+        for index, char in enumerate(alphabet):
+            encoded = str(char).encode("utf-8")
+            if len(encoded) != 1:
+                raise ValueError(f"'{char}' ist kein einzelnes Zeichen und kann nicht aus einer Datei "
+                                 f"gelesen werden.")
+            table[encoded[0]] = index
+        return bytes(table)
+
+    @staticmethod
+    def _encode(data, span: Tuple[int, int], table: bytes, kind: str) -> array:
+        """Übersetzt einen Zeilenbereich in ein uint8-Array; Leerzeichen werden entfernt."""
+        start, end = span
+        encoded = data[start:end].translate(table, _WHITESPACE)
+        unknown = encoded.find(_UNKNOWN)
+        if unknown != -1:
+            char = data[start:end].translate(None, _WHITESPACE)[unknown:unknown + 1].decode("utf-8", "replace")
+            if kind == "Symbol":
+                raise ValueError(f"Symbol '{char}' nicht im Emissionsmodell enthalten.")
+            raise ValueError(f"Unbekannter Zustand: '{char}'")
+        codes = array("B")
+        codes.frombytes(encoded)
+        return codes
+
+    @staticmethod
+    def _text(data, span: Tuple[int, int]) -> str:
+        """Zeilenbereich als Text ohne führende und abschließende Leerzeichen."""
+        start, end = span
+        return bytes(data[start:end]).decode("utf-8").strip()
@@ -37,6 +37,14 @@ class HMM:
             if state not in self._emissions:
                 raise ValueError(f"Emissionswahrscheinlichkeiten fehlen für Zustand: {state}")    
         
+    def compile(self):
+        """
+        Erzeugt eine array-basierte Darstellung (CompiledHMM) mit ganzzahligen Indizes
+        für Zustände und Symbole sowie vorberechneten Log-Tabellen.
+        """
+        from src.compiled_hmm import CompiledHMM
+        return CompiledHMM(self)
+
     # ---------- Getter ----------
     def get_emission_row(self, state: str) -> dict:
         """
@@ -0,0 +1,327 @@
+import os
+import random
+import time
+from array import array
+from multiprocessing import Pool
+from operator import mul
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+from src.hidden_markov_model import HMM
+from src.compiled_hmm import CompiledHMM
+from src.posterior_decoder import PosteriorDecoder
+from src.viterbi_decoder import ViterbiDecoder
+
+try:
+    import numpy as np
+except ImportError:  # NumPy ist optional und wird nur für engine="numpy" benötigt
+    np = None
+
+Counts = Tuple[array, array, array, float]
+
+# ---------- Worker-Prozesse ----------
+# Die (kodierten) Trainingssequenzen werden jedem Worker einmal über den Initializer
+# übergeben; pro Iteration werden nur das aktuelle Modell und Indexbereiche verschickt.
+_worker_sequences: List[Sequence[int]] = []
+
+
+def _init_worker(sequences: List[Sequence[int]]):
+    """Initializer der Worker-Prozesse: merkt sich die Trainingssequenzen."""
+    global _worker_sequences
+    _worker_sequences = sequences
+
+
+def _count_task(task: Tuple[CompiledHMM, str, str, int, int]) -> Counts:
+    """E-Schritt für die Sequenzen first..last-1 im Worker."""
+    model, method, engine, first, last = task
+    return expected_counts(model, method, _worker_sequences[first:last], engine)
+
+
+def _new_counts(model: CompiledHMM) -> Counts:
+    """Leere Zähler: (Start, Übergänge, Emissionen, Log-Likelihood)."""
+    n, m = model.n_states, model.n_symbols
+    return array("d", bytes(8 * n)), array("d", bytes(8 * n * n)), array("d", bytes(8 * n * m)), 0.0
+
+
+def _add_counts(total: Counts, counts: Counts) -> Counts:
+    """Addiert zwei Zähler elementweise."""
+    for target, source in zip(total[:3], counts[:3]):
+        for index, value in enumerate(source):
+            target[index] += value
+    return total[0], total[1], total[2], total[3] + counts[3]
+
+
+# ---------- E-Schritt ----------
+def expected_counts(model: CompiledHMM, method: str, sequences: Iterable[Sequence[int]],
+                    engine: str = "python") -> Counts:
+    """
+    Zählt für kodierte Sequenzen die (erwarteten) Starts, Übergänge und Emissionen.
+
+    - "baum-welch": erwartete Anzahlen aus Forward-Backward (skaliert)
+    - "viterbi":    Anzahlen entlang des besten Pfades
+
+    engine="numpy" rechnet Forward/Backward mit NumPy und summiert die Anzahlen
+    über die ganze Sequenz vektorisiert (lohnt sich für Modelle mit vielen Zuständen).
+    Rückgabe: (Start[N], Übergänge[N*N], Emissionen[N*M], Summe der Log-Likelihoods).
+    """
+    start, transitions, emissions, log_likelihood = _new_counts(model)
+    n, m = model.n_states, model.n_symbols
+
+    if method == "viterbi":
+        decoder = ViterbiDecoder(model, use_log=True, engine="numpy" if engine == "numpy" else "backpointer")
+        for codes in sequences:
+            if len(codes) == 0:
+                continue
+            path, log_prob = decoder.decode_encoded_with_log_probability(codes)
+            log_likelihood += log_prob
+            start[path[0]] += 1.0
+            for t in range(len(codes)):
+                emissions[path[t] * m + codes[t]] += 1.0
+                if t > 0:
+                    transitions[path[t - 1] * n + path[t]] += 1.0
+        return start, transitions, emissions, log_likelihood
+
+    if engine == "numpy":
+        return _expected_counts_numpy(model, sequences)
+
+    decoder = PosteriorDecoder(model)
+    trans_rows = [model.transitions[i * n:(i + 1) * n] for i in range(n)]
+    emit_cols = model.emission_columns(False)
+    states = range(n)
+    for codes in sequences:
+        length = len(codes)
+        if length == 0:
+            continue
+        alphas, sequence_likelihood = decoder.forward_columns(codes)
+        log_likelihood += sequence_likelihood
+
+        beta = [1.0] * n
+        for t in range(length - 1, -1, -1):
+            alpha = alphas[t]
+            if t < length - 1:
+                # xi_t(i, j) ∝ alpha_t(i) · a_ij · e_j(o_{t+1}) · beta_{t+1}(j)
+                weighted = list(map(mul, emit_cols[codes[t + 1]], beta))
+                xi = [[alpha[i] * a * w for a, w in zip(trans_rows[i], weighted)] for i in states]
+                total = sum(map(sum, xi))
+                for i in states:
+                    offset = i * n
+                    for j, value in enumerate(xi[i]):
+                        transitions[offset + j] += value / total
+                beta = decoder.backward_step(beta, codes[t + 1])
+
+            gamma = decoder.posterior_column(alpha, beta)
+            symbol = codes[t]
+            for i in states:
+                emissions[i * m + symbol] += gamma[i]
+            if t == 0:
+                for i in states:
+                    start[i] += gamma[i]
+    return start, transitions, emissions, log_likelihood
+
+
+def _expected_counts_numpy(model: CompiledHMM, sequences: Iterable[Sequence[int]]) -> Counts:
+    """Baum-Welch-E-Schritt mit NumPy: Rekursionen pro Zeitschritt, Summen über alle Zeitpunkte auf einmal."""
+    n, m = model.n_states, model.n_symbols
+    decoder = PosteriorDecoder(model, engine="numpy")
+    _, transitions, emissions = model.numpy_tables(False)
+    emit_by_symbol = np.ascontiguousarray(emissions.T)  # (M, N)
+    start_counts = np.zeros(n)
+    trans_counts = np.zeros((n, n))
+    emit_counts = np.zeros((n, m))
+    log_likelihood = 0.0
+
+    for codes in sequences:
+        length = len(codes)
+        if length == 0:
+            continue
+        alphas, sequence_likelihood = decoder.forward_columns(codes)  # (T, N), normiert
+        log_likelihood += sequence_likelihood
+
+        betas = np.empty((length, n))
+        betas[-1] = 1.0
+        for t in range(length - 2, -1, -1):
+            betas[t] = decoder.backward_step(betas[t + 1], codes[t + 1])
+
+        # gamma_t(i) ∝ alpha_t(i) · beta_t(i)
+        gamma = alphas * betas
+        gamma /= gamma.sum(axis=1, keepdims=True)
+        symbols = np.asarray(codes, dtype=np.intp)
+        start_counts += gamma[0]
+        for i in range(n):
+            emit_counts[i] += np.bincount(symbols, weights=gamma[:, i], minlength=m)
+
+        # Σ_t xi_t(i, j) = a_ij · Σ_t alpha_t(i) · w_t(j) / Σ_kl alpha_t(k) a_kl w_t(l),  w_t = e(o_{t+1}) · beta_{t+1}
+        if length > 1:
+            weighted = emit_by_symbol[symbols[1:]] * betas[1:]
+            totals = ((alphas[:-1] @ transitions) * weighted).sum(axis=1)
+            trans_counts += transitions * ((alphas[:-1] / totals[:, None]).T @ weighted)
+
+    return (array("d", start_counts.tolist()), array("d", trans_counts.ravel().tolist()),
+            array("d", emit_counts.ravel().tolist()), log_likelihood)
+
+
+# ---------- Training ----------
+class HMMTrainer:
+    """
+    Schätzt Start-, Übergangs- und Emissionswahrscheinlichkeiten eines HMM aus Sequenzen.
+
+    - "baum-welch": EM mit erwarteten Anzahlen aus Forward-Backward (maximiert die Likelihood)
+    - "viterbi":    schneller; zählt nur entlang des jeweils besten Pfades (Viterbi-Training)
+
+    Der E-Schritt wird über einen Prozess-Pool auf die Sequenzen verteilt; die Zähler
+    liegen als double-Arrays vor und werden im Hauptprozess addiert. Nach jeder Iteration
+    wird ein Eintrag in history geschrieben (Log-Likelihood, Verbesserung, Laufzeit).
+    Das Training endet, wenn sich die Log-Likelihood relativ um weniger als tolerance
+    ändert oder max_iterations erreicht ist.
+    """
+
+    METHODS = ("baum-welch", "viterbi")
+
+    def __init__(self, initial_model: Union[HMM, CompiledHMM], method: str = "baum-welch",
+                 max_iterations: int = 100, tolerance: float = 1e-6, pseudocount: float = 0.0,
+                 workers: Optional[int] = None, chunk_symbols: int = 100_000, engine: str = "python",
+                 verbose: bool = False):
+        if method not in self.METHODS:
+            raise ValueError(f"Unbekanntes Verfahren '{method}'. Erlaubt: {', '.join(self.METHODS)}")
+        if engine not in PosteriorDecoder.ENGINES:
+            raise ValueError(f"Unbekannte Engine '{engine}'. Erlaubt: {', '.join(PosteriorDecoder.ENGINES)}")
+        if engine == "numpy" and np is None:
+            raise ImportError("Die Engine 'numpy' benötigt NumPy (pip install numpy).")
+        if max_iterations < 1:
+            raise ValueError("max_iterations muss mindestens 1 sein.")
+        if pseudocount < 0:
+            raise ValueError("pseudocount darf nicht negativ sein.")
+        self.model = initial_model.compile()
+        self.method = method
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+        # Pseudozähler werden zu jedem Zähler addiert (verhindert Wahrscheinlichkeiten von 0)
+        self.pseudocount = pseudocount
+        # Anzahl der Prozesse (None → Anzahl CPU-Kerne, 1 → ohne Pool im aktuellen Prozess)
+        self.workers = workers
+        self.chunk_symbols = chunk_symbols
+        # "python" oder "numpy" für den E-Schritt
+        self.engine = engine
+        self.verbose = verbose
+
+        self.history: List[dict] = []
+        self.converged = False
+
+    def fit(self, sequences: Iterable[Sequence[str]]) -> HMM:
+        """Trainiert auf Sequenzen von Symbolen und gibt das geschätzte Modell als HMM zurück."""
+        return self.fit_encoded([self.model.encode(observations) for observations in sequences])
+
+    def fit_encoded(self, sequences: List[Sequence[int]]) -> HMM:
+        """Wie fit, aber für kodierte Sequenzen (Symbol-Indizes des Startmodells)."""
+        workers = self.workers if self.workers is not None else (os.cpu_count() or 1)
+        tasks = self._task_ranges(sequences)
+        self.history = []
+        self.converged = False
+
+        pool = None
+        if workers > 1 and len(tasks) > 1:
+            pool = Pool(min(workers, len(tasks)), initializer=_init_worker, initargs=(sequences,))
+        try:
+            previous = None
+            for iteration in range(1, self.max_iterations + 1):
+                started = time.perf_counter()
+
+                # E-Schritt (parallel über die Sequenzen)
+                work = [(self.model, self.method, self.engine, first, last) for first, last in tasks]
+                if pool is None:
+                    _init_worker(sequences)
+                    results = map(_count_task, work)
+                else:
+                    # imap statt imap_unordered: feste Summationsreihenfolge, reproduzierbare Ergebnisse
+                    results = pool.imap(_count_task, work)
+                counts = _new_counts(self.model)
+                for partial in results:
+                    counts = _add_counts(counts, partial)
+
+                # M-Schritt
+                self.model = self._maximize(counts)
+                log_likelihood = counts[3]
+
+                improvement = None if previous is None else log_likelihood - previous
+                entry = {
+                    "iteration": iteration,
+                    "log_likelihood": log_likelihood,
+                    "improvement": improvement,
+                    "seconds": time.perf_counter() - started,
+                }
+                self.history.append(entry)
+                if self.verbose:
+                    change = "" if improvement is None else f", Änderung {improvement:+.6f}"
+                    print(f"[Iteration {iteration}] Log-Likelihood {log_likelihood:.6f}{change} "
+                          f"({entry['seconds']:.3f} s)")
+
+                if improvement is not None and abs(improvement) <= self.tolerance * max(1.0, abs(log_likelihood)):
+                    self.converged = True
+                    break
+                previous = log_likelihood
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        return self.model.to_hmm()
+
+    def _task_ranges(self, sequences: List[Sequence[int]]) -> List[Tuple[int, int]]:
+        """Teilt die Sequenzen in Indexbereiche mit jeweils etwa chunk_symbols Symbolen."""
+        ranges = []
+        first = 0
+        size = 0
+        for index, codes in enumerate(sequences):
+            size += len(codes)
+            if size >= self.chunk_symbols:
+                ranges.append((first, index + 1))
+                first = index + 1
+                size = 0
+        if first < len(sequences):
+            ranges.append((first, len(sequences)))
+        return ranges
+
+    def _maximize(self, counts: Counts) -> CompiledHMM:
+        """M-Schritt: normiert die Zähler zeilenweise zu Wahrscheinlichkeiten."""
+        model = self.model
+        n, m = model.n_states, model.n_symbols
+        start, transitions, emissions, _ = counts
+        return CompiledHMM.from_tables(
+            model.states, model.symbols,
+            self._normalize(start, model.start, 0, n),
+            self._normalize_rows(transitions, model.transitions, n, n),
+            self._normalize_rows(emissions, model.emissions, n, m),
+        )
+
+    def _normalize_rows(self, counts: array, previous, rows: int, width: int) -> array:
+        """Normiert jede Zeile einer zeilenweisen Tabelle."""
+        table = array("d")
+        for row in range(rows):
+            table.extend(self._normalize(counts, previous, row * width, width))
+        return table
+
+    def _normalize(self, counts: array, previous, offset: int, width: int) -> array:
+        """
+        Normiert counts[offset:offset+width] (plus Pseudozähler) auf Summe 1.
+        Wurde eine Zeile nie beobachtet, bleiben die bisherigen Wahrscheinlichkeiten erhalten.
+        """
+        row = [value + self.pseudocount for value in counts[offset:offset + width]]
+        total = sum(row)
+        if not total > 0.0:
+            return array("d", previous[offset:offset + width])
+        return array("d", (value / total for value in row))
+
+
+def random_hmm(states: Sequence[str], symbols: Sequence[str], seed: Optional[int] = None) -> HMM:
+    """Zufälliges Startmodell für das Training (alle Wahrscheinlichkeiten > 0, Zeilen normiert)."""
+    rng = random.Random(seed)
+
+    def distribution(keys):
+        weights = [rng.uniform(0.5, 1.5) for _ in keys]
+        total = sum(weights)
+        return {key: weight / total for key, weight in zip(keys, weights)}
+
+    return HMM(
+        list(states),
+        distribution(states),
+        {state: distribution(states) for state in states},
+        {state: distribution(symbols) for state in states},
+    )
@@ -0,0 +1,208 @@
+import json
+import mmap
+import struct
+import sys
+from array import array
+from typing import Optional, Sequence, Union
+from src.hidden_markov_model import HMM
+from src.compiled_hmm import CompiledHMM, TABLE_NAMES
+from src.file_parser import SequenceRecord
+
+# ---------- Binärformat ----------
+# Aufbau einer Datei:
+#   Kopf (16 Byte):  Magic "VITB" | Version (uint16) | Art (uint16) | Länge des JSON-Headers (uint32) | 0 (uint32)
+#   JSON-Header:     Namen der Zustände/Symbole und Lage der Arrays, mit Leerzeichen auf 8 Byte aufgefüllt
+#   Daten:           rohe Arrays in Little-Endian, jeweils an 8 Byte ausgerichtet
+# Beim Laden wird die Datei per mmap abgebildet; die Arrays werden als memoryview
+# verwendet und nicht kopiert (auf Big-Endian-Systemen wird einmal umgedreht).
+MAGIC = b"VITB"
+VERSION = 1
+KIND_MODEL = 1
+KIND_SEQUENCE = 2
+_PREFIX = struct.Struct("<4sHHII")
+_ALIGN = 8
+
+# Typcodes im Header → array-Typcodes mit passender Größe
+_TYPECODES = {"f8": "d", "u1": "B", "u2": "H", "u4": "I", "u8": "Q"}
+
+Model = Union[HMM, CompiledHMM]
+
+
+def _dtype(values) -> str:
+    """Beschreibt den Elementtyp eines Arrays plattformunabhängig (z. B. "f8", "u2")."""
+    itemsize = memoryview(values).itemsize
+    return f"{'f' if memoryview(values).format == 'd' else 'u'}{itemsize}"
+
+
+def _write_container(path: str, kind: int, meta: dict, arrays: dict):
+    """Schreibt Header und Arrays in eine Binärdatei."""
+    layout = []
+    offset = 0
+    for name, values in arrays.items():
+        size = len(values) * memoryview(values).itemsize
+        layout.append({"name": name, "dtype": _dtype(values), "offset": offset, "length": len(values)})
+        offset += (size + _ALIGN - 1) // _ALIGN * _ALIGN
+    meta = dict(meta, arrays=layout)
+
+    header = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+    header += b" " * (-(len(header) + _PREFIX.size) % _ALIGN)
+
+    with open(path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, VERSION, kind, len(header), 0))
+        f.write(header)
+        for values in arrays.values():
+            if sys.byteorder == "big" and memoryview(values).itemsize > 1:
+                values = array(memoryview(values).format, values)
+                values.byteswap()
+            data = memoryview(values).cast("B")
+            f.write(data)
+            f.write(b"\0" * (-len(data) % _ALIGN))
+
+
+def _read_container(path: str, kind: int):
+    """Bildet eine Binärdatei ab und gibt (Header, {Name: memoryview}) zurück."""
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(data) < _PREFIX.size:
+        raise ValueError(f"Datei '{path}' ist keine gültige Binärdatei.")
+    magic, version, file_kind, header_length, _ = _PREFIX.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"Datei '{path}' ist keine gültige Binärdatei.")
+    if version > VERSION:
+        raise ValueError(f"Dateiversion {version} wird nicht unterstützt (höchstens {VERSION}).")
+    if file_kind != kind:
+        expected = "ein Modell" if kind == KIND_MODEL else "eine Sequenz"
+        raise ValueError(f"Datei '{path}' enthält nicht {expected}.")
+
+    start = _PREFIX.size + header_length
+    meta = json.loads(bytes(data[_PREFIX.size:start]).decode("utf-8"))
+    view = memoryview(data)
+    arrays = {}
+    for entry in meta["arrays"]:
+        typecode = _TYPECODES[entry["dtype"]]
+        size = entry["length"] * array(typecode).itemsize
+        first = start + entry["offset"]
+        if first + size > len(data):
+            raise ValueError(f"Datei '{path}' ist unvollständig.")
+        values = view[first:first + size].cast(typecode)
+        if sys.byteorder == "big" and values.itemsize > 1:
+            values = array(typecode, values)
+            values.byteswap()
+        arrays[entry["name"]] = values
+    return meta, arrays
+
+
+def _is_binary(path: str) -> bool:
+    """Prüft anhand der ersten Bytes, ob eine Datei im Binärformat vorliegt."""
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+# ---------- Modelle ----------
+def save_model(model: Model, path: str):
+    """
+    Speichert ein HMM im Binärformat. Neben den Wahrscheinlichkeiten werden auch die
+    Log-Tabellen gespeichert, damit beim Laden nichts berechnet werden muss.
+    """
+    compiled = model.compile()
+    meta = {"states": compiled.states, "symbols": compiled.symbols}
+    _write_container(path, KIND_MODEL, meta, {name: getattr(compiled, name) for name in TABLE_NAMES})
+
+
+def save_model_json(model: Model, path: str):
+    """Speichert ein HMM als lesbare JSON-Datei (Dictionaries wie im HMM-Konstruktor)."""
+    compiled = model.compile()
+    hmm = compiled.to_hmm()
+    document = {
+        "format": "hmm",
+        "version": VERSION,
+        "states": hmm.states,
+        "start": {state: hmm.get_start_prob_normal(state) for state in hmm.states},
+        "transitions": {state: hmm.get_transition_row(state) for state in hmm.states},
+        "emissions": {state: hmm.get_emission_row(state) for state in hmm.states},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, ensure_ascii=False, indent=2)
+
+
+def load_model(path: str) -> Model:
+    """
+    Lädt ein Modell. Binärdateien werden ohne Kopie als CompiledHMM abgebildet,
+    JSON-Dateien als HMM eingelesen. Beide können direkt an ViterbiDecoder übergeben werden.
+    """
+    if _is_binary(path):
+        meta, arrays = _read_container(path, KIND_MODEL)
+        return CompiledHMM.from_tables(meta["states"], meta["symbols"], **arrays)
+
+    with open(path, "r", encoding="utf-8") as f:
+        document = json.load(f)
+    if document.get("format") != "hmm":
+        raise ValueError(f"Datei '{path}' enthält kein HMM.")
+    return HMM(document["states"], document["start"], document["transitions"], document["emissions"])
+
+
+# ---------- Sequenzen ----------
+def _codes(model: CompiledHMM, values, states: bool) -> array:
+    """Kodiert Symbole bzw. Zustände; bereits kodierte Arrays werden unverändert übernommen."""
+    if isinstance(values, (array, memoryview, bytes, bytearray)):
+        return values
+    return model.encode_states(values) if states else model.encode(values)
+
+
+def save_sequence(path: str, model: Model, observations: Sequence, states: Optional[Sequence] = None,
+                  name: str = ""):
+    """
+    Speichert eine Beobachtungsfolge (und optional die Zustände) im Binärformat.
+    Es können Symbole oder bereits kodierte Arrays (z. B. SequenceRecord.observations)
+    übergeben werden; die Alphabete des Modells werden mitgespeichert.
+    """
+    compiled = model.compile()
+    arrays = {"observations": _codes(compiled, observations, False)}
+    if states is not None:
+        arrays["states"] = _codes(compiled, states, True)
+        if len(arrays["states"]) != len(arrays["observations"]):
+            raise ValueError("Zahlenfolge und Zustandsfolge haben unterschiedliche Längen.")
+    meta = {"name": name, "symbols": compiled.symbols, "states": compiled.states}
+    _write_container(path, KIND_SEQUENCE, meta, arrays)
+
+
+def save_sequence_json(path: str, model: Model, observations: Sequence, states: Optional[Sequence] = None,
+                       name: str = ""):
+    """Speichert eine Sequenz lesbar als JSON (Symbole und Zustände als Namen)."""
+    compiled = model.compile()
+    observations = compiled.symbol_names(_codes(compiled, observations, False))
+    document = {"format": "sequence", "version": VERSION, "name": name, "observations": observations}
+    if states is not None:
+        document["states"] = compiled.state_names(_codes(compiled, states, True))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, ensure_ascii=False)
+
+
+def load_sequence(path: str, model: Optional[Model] = None) -> SequenceRecord:
+    """
+    Lädt eine Sequenz als SequenceRecord mit kodierten Beobachtungen und Zuständen.
+
+    Binärdateien werden ohne Kopie abgebildet. Wird ein Modell übergeben, muss die
+    Kodierung zu dessen Alphabeten passen (bei JSON wird mit dem Modell kodiert).
+    """
+    compiled = model.compile() if model is not None else None
+
+    if _is_binary(path):
+        meta, arrays = _read_container(path, KIND_SEQUENCE)
+        if compiled is not None and (meta["symbols"] != compiled.symbols or meta["states"] != compiled.states):
+            raise ValueError(f"Die Sequenz in '{path}' wurde mit einem anderen Alphabet gespeichert.")
+        return SequenceRecord(meta["name"], arrays["observations"], arrays.get("states"))
+
+    with open(path, "r", encoding="utf-8") as f:
+        document = json.load(f)
+    if document.get("format") != "sequence":
+        raise ValueError(f"Datei '{path}' enthält keine Sequenz.")
+    if compiled is None:
+        raise ValueError("Zum Laden einer JSON-Sequenz wird ein Modell benötigt.")
+    states = document.get("states")
+    return SequenceRecord(
+        document.get("name", ""),
+        compiled.encode(document["observations"]),
+        compiled.encode_states(states) if states is not None else None,
+    )
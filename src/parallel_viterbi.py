@@ -0,0 +1,187 @@
+import os
+from array import array
+from multiprocessing import Pool
+from typing import List, Optional, Sequence, Tuple
+from src.compiled_hmm import index_array, index_typecode
+
+NEG_INF = float("-inf")
+
+# ---------- Worker-Prozesse ----------
+# Jeder Worker erhält das kompilierte Modell einmal über den Initializer.
+_worker_decoder = None
+
+
+def _init_worker(model):
+    """Initializer der Worker-Prozesse: baut einen Log-Decoder für die Teilaufgaben."""
+    global _worker_decoder
+    from src.viterbi_decoder import ViterbiDecoder
+    _worker_decoder = ViterbiDecoder(model, use_log=True, engine="backpointer")
+
+
+def _chunk_vector(codes: Sequence[int]) -> List[float]:
+    """Erster Abschnitt: normale Vorwärtsrekursion ab der Initialisierung, liefert die letzte Spalte."""
+    decoder = _worker_decoder
+    n = decoder.model.n_states
+    backpointers = index_array(n, (len(codes) - 1) * n)
+    column, _ = decoder.initial_column(codes[0])
+    column, _ = decoder.forward(codes, 1, len(codes), column, backpointers, 1)
+    return column
+
+
+def _chunk_matrix(codes: Sequence[int]) -> List[List[float]]:
+    """
+    Max-Plus-Transfermatrix eines Abschnitts:
+    matrix[i][j] = bester Log-Score eines Pfades, der vor dem Abschnitt in Zustand i
+    steht und am Ende des Abschnitts in Zustand j ankommt.
+    """
+    model = _worker_decoder.model
+    n = model.n_states
+    states = range(n)
+    trans_cols = model.transition_columns(True)
+    emit_cols = model.emission_columns(True)
+
+    rows = [[0.0 if k == i else NEG_INF for k in states] for i in states]
+    for symbol in codes:
+        emit = emit_cols[symbol]
+        new_rows = []
+        for row in rows:
+            new_row = []
+            for j in states:
+                trans = trans_cols[j]
+                emit_p = emit[j]
+                best = NEG_INF
+                for k in states:
+                    prob = row[k] + trans[k] + emit_p
+                    if prob > best:
+                        best = prob
+                new_row.append(best)
+            new_rows.append(new_row)
+        rows = new_rows
+    return rows
+
+
+def _chunk_path(task: Tuple[Sequence[int], Optional[int], int]) -> array:
+    """
+    Traceback eines Abschnitts bei bekannten Randzuständen: Der Zustand vor dem
+    Abschnitt (None beim ersten Abschnitt) und der Zustand am Ende sind fest.
+    """
+    codes, start_state, end_state = task
+    decoder = _worker_decoder
+    n = decoder.model.n_states
+    length = len(codes)
+
+    if start_state is None:
+        column, _ = decoder.initial_column(codes[0])
+        offset = 1
+    else:
+        column = [0.0 if k == start_state else NEG_INF for k in range(n)]
+        offset = 0
+
+    backpointers = index_array(n, (length - offset) * n)
+    decoder.forward(codes, offset, length, column, backpointers, offset)
+    path = index_array(n, length)
+    path[length - 1] = end_state
+    decoder.trace_segment(path, backpointers, offset, 1, length - 1)
+    return path
+
+
+def _run_task(task):
+    """Verteilt eine Teilaufgabe an die passende Funktion."""
+    kind, payload = task
+    if kind == "vector":
+        return _chunk_vector(payload)
+    if kind == "matrix":
+        return _chunk_matrix(payload)
+    return _chunk_path(payload)
+
+
+# ---------- Öffentliche Funktion ----------
+def decode_parallel(model, codes: Sequence[int], workers: Optional[int] = None,
+                    chunks: Optional[int] = None) -> Tuple[array, float]:
+    """
+    Paralleler Viterbi für eine einzelne lange Sequenz (nur Log-Modus).
+
+    1. Die Sequenz wird in Abschnitte geteilt. Für den ersten Abschnitt wird die
+       letzte Spalte berechnet, für alle weiteren parallel die N×N-Max-Plus-Transfermatrix.
+    2. Ein (assoziativer) Max-Plus-Scan über die Abschnitte liefert die Spalten an
+       den Abschnittsgrenzen und merkt sich die jeweils besten Randzustände.
+    3. Mit bekannten Randzuständen wird jeder Abschnitt parallel neu berechnet und
+       zurückverfolgt; die Teilpfade werden aneinandergehängt.
+
+    Der Pfad entspricht dem sequenziellen Viterbi-Pfad; nur bei exakt gleich guten
+    Pfaden kann die andere Summationsreihenfolge zu einem anderen gleichwertigen Pfad führen.
+    Der Aufwand für die Transfermatrizen ist N-mal so hoch wie die normale Rekursion,
+    das Verfahren lohnt sich daher vor allem für Modelle mit wenigen Zuständen.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunks is None:
+        chunks = workers
+    n = model.n_states
+    length = len(codes)
+    if not isinstance(codes, array):
+        # Abschnitte werden an Worker gepickelt; memoryviews (z. B. aus model_io) sind nicht pickelbar
+        codes = array(index_typecode(model.n_symbols), codes)
+
+    # Abschnittsgrenzen: Abschnitt c umfasst die Zeitpunkte bounds[c] .. bounds[c+1]-1
+    chunks = max(1, min(chunks, length // 2))
+    bounds = [length * c // chunks for c in range(chunks + 1)]
+    pieces = [codes[bounds[c]:bounds[c + 1]] for c in range(chunks)]
+
+    tasks = [("vector", pieces[0])] + [("matrix", piece) for piece in pieces[1:]]
+    if workers <= 1:
+        _init_worker(model)
+        pool = None
+    else:
+        pool = Pool(workers, initializer=_init_worker, initargs=(model,))
+
+    try:
+        if pool is None:
+            results = [_run_task(task) for task in tasks]
+        else:
+            results = pool.map(_run_task, tasks, chunksize=1)
+
+        # --- Max-Plus-Scan: Spalte am Ende jedes Abschnitts und beste Vorgänger an den Grenzen ---
+        column = results[0]
+        boundary_argmax: List[List[int]] = []
+        for matrix in results[1:]:
+            new_column = []
+            argmax = []
+            for j in range(n):
+                best = NEG_INF
+                best_i = 0
+                for i in range(n):
+                    prob = column[i] + matrix[i][j]
+                    if prob > best:
+                        best = prob
+                        best_i = i
+                new_column.append(best)
+                argmax.append(best_i)
+            if max(new_column) == NEG_INF:
+                raise ValueError("Kein gültiger Pfad gefunden.")
+            column = new_column
+            boundary_argmax.append(argmax)
+
+        # --- Randzustände rückwärts bestimmen ---
+        final_state = max(range(n), key=column.__getitem__)
+        end_states = [0] * chunks
+        end_states[-1] = final_state
+        for c in range(chunks - 1, 0, -1):
+            end_states[c - 1] = boundary_argmax[c - 1][end_states[c]]
+
+        # --- Abschnitte parallel zurückverfolgen ---
+        path_tasks = [("path", (pieces[c], end_states[c - 1] if c > 0 else None, end_states[c]))
+                      for c in range(chunks)]
+        if pool is None:
+            segments = [_run_task(task) for task in path_tasks]
+        else:
+            segments = pool.map(_run_task, path_tasks, chunksize=1)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    path = index_array(n, 0)
+    for segment in segments:
+        path.extend(segment)
+    return path, column[final_state]
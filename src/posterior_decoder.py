@@ -0,0 +1,281 @@
+import math
+from array import array
+from operator import mul
+from typing import Dict, List, Optional, Sequence, Union
+from src.hidden_markov_model import HMM
+from src.compiled_hmm import CompiledHMM, index_array
+from src.tracing import Tracer
+
+try:
+    import numpy as np
+except ImportError:  # NumPy ist optional und wird nur für die Engine "numpy" benötigt
+    np = None
+
+
+class PosteriorResult:
+    """Ergebnis einer Posterior-Dekodierung (Forward-Backward)."""
+
+    def __init__(self, path: array, log_likelihood: float, posteriors: Optional[array], n_states: int):
+        self.path = path                      # Zustand mit höchster Posterior-Wahrscheinlichkeit je Position
+        self.log_likelihood = log_likelihood  # log P(Beobachtungen | Modell)
+        self.posteriors = posteriors          # array('d'), zeilenweise: posteriors[t * N + i] (oder None)
+        self.n_states = n_states
+
+    def column(self, t: int) -> List[float]:
+        """Posterior-Wahrscheinlichkeiten aller Zustände zum Zeitpunkt t."""
+        n = self.n_states
+        return list(self.posteriors[t * n:(t + 1) * n])
+
+
+class PosteriorDecoder:
+    """
+    Forward-Backward-Algorithmus für Posterior-Wahrscheinlichkeiten P(Zustand_t = i | Beobachtungen).
+
+    Gerechnet wird mit skalierten Wahrscheinlichkeiten: Jede Forward-Spalte wird auf Summe 1
+    normiert, der Logarithmus der Normierungsfaktoren ergibt die Log-Likelihood der Sequenz.
+    Die Backward-Spalten werden ebenfalls normiert (ihr Faktor kürzt sich im Posterior heraus).
+
+    Mit segment_length werden – wie bei der Viterbi-Engine "checkpoint" – nur die Forward-Spalten
+    an Segmentgrenzen gespeichert und beim Backward-Durchlauf segmentweise neu berechnet.
+    Der Speicher für Zwischenergebnisse sinkt damit von T×N auf (T/K + K)×N Werte.
+
+    Engines: "python" (ohne Abhängigkeiten) und "numpy" (jeder Zeitschritt als Matrix-Vektor-Produkt).
+    """
+
+    ENGINES = ("python", "numpy")
+
+    def __init__(self, hmm: Union[HMM, CompiledHMM], engine: str = "python",
+                 segment_length: Optional[int] = None, tracer: Optional[Tracer] = None):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unbekannte Engine '{engine}'. Erlaubt: {', '.join(self.ENGINES)}")
+        if engine == "numpy" and np is None:
+            raise ImportError("Die Engine 'numpy' benötigt NumPy (pip install numpy).")
+        if segment_length is not None and segment_length < 1:
+            raise ValueError("segment_length muss mindestens 1 sein.")
+        self.hmm = hmm
+        self.engine = engine
+        self.segment_length = segment_length
+        self.tracer = tracer if tracer is not None else Tracer()
+        self.model = hmm.compile()
+
+        n = self.model.n_states
+        if engine == "numpy":
+            self._start, self._transitions, emissions = self.model.numpy_tables(False)
+            self._emissions = np.ascontiguousarray(emissions.T)  # (M, N): Emissionsspalte je Symbol
+        else:
+            self._trans_cols = self.model.transition_columns(False)
+            self._trans_rows = [list(self.model.transitions[i * n:(i + 1) * n]) for i in range(n)]
+            self._emit_cols = self.model.emission_columns(False)
+
+    # ---------- Öffentliche Schnittstelle ----------
+    def decode(self, observations: List[str]) -> List[str]:
+        """Posterior-Dekodierung: für jede Position der Zustand mit der höchsten Posterior-Wahrscheinlichkeit."""
+        if not observations:
+            return []
+        result = self.analyze_encoded(self.model.encode(observations), keep_posteriors=False)
+        return self.model.state_names(result.path)
+
+    def posteriors(self, observations: List[str]) -> List[Dict[str, float]]:
+        """Posterior-Wahrscheinlichkeiten aller Zustände für jede Position als Dictionaries."""
+        if not observations:
+            return []
+        result = self.analyze_encoded(self.model.encode(observations))
+        states = self.model.states
+        return [dict(zip(states, result.column(t))) for t in range(len(observations))]
+
+    def log_likelihood(self, observations: List[str]) -> float:
+        """log P(Beobachtungen | Modell); nur Forward-Durchlauf, Speicherbedarf O(N)."""
+        if not observations:
+            return 0.0
+        codes = self.model.encode(observations)
+        self.tracer.on_decode_begin(len(codes), self.model.n_states, f"posterior/{self.engine}")
+        self.tracer.begin_phase("forward")
+        _, _, log_likelihood = self._forward_pass(codes, None)
+        self.tracer.end_phase("forward", len(codes) * self.model.n_states)
+        self.tracer.on_decode_end()
+        return log_likelihood
+
+    def analyze(self, observations: List[str], keep_posteriors: bool = True) -> PosteriorResult:
+        """Posterior-Pfad, Log-Likelihood und (optional) alle Posterior-Wahrscheinlichkeiten."""
+        return self.analyze_encoded(self.model.encode(observations), keep_posteriors)
+
+    def analyze_encoded(self, codes: Sequence[int], keep_posteriors: bool = True) -> PosteriorResult:
+        """
+        Wie analyze, aber für kodierte Beobachtungen (Symbol-Indizes des kompilierten Modells).
+        Mit keep_posteriors=False wird nur der Posterior-Pfad gespeichert (O(T) statt O(T×N)).
+        """
+        n = self.model.n_states
+        length = len(codes)
+        path = index_array(n, length)
+        posteriors = array("d", bytes(8 * length * n)) if keep_posteriors else None
+        if length == 0:
+            return PosteriorResult(path, 0.0, posteriors, n)
+
+        segment = self.segment_length or length
+        tracer = self.tracer
+        tracer.on_decode_begin(length, n, f"posterior/{self.engine}")
+
+        tracer.begin_phase("forward")
+        checkpoints, buffer, log_likelihood = self._forward_pass(codes, segment)
+        tracer.end_phase("forward", length * n)
+
+        tracer.begin_phase("backward")
+        for t, column in self._backward_pass(codes, segment, checkpoints, buffer):
+            best = 0
+            best_value = column[0]
+            for i in range(1, n):
+                if column[i] > best_value:
+                    best = i
+                    best_value = column[i]
+            path[t] = best
+            if posteriors is not None:
+                posteriors[t * n:(t + 1) * n] = array("d", column)
+        tracer.end_phase("backward", length * n)
+
+        tracer.on_decode_end()
+        return PosteriorResult(path, log_likelihood, posteriors, n)
+
+    def forward_columns(self, codes: Sequence[int]):
+        """
+        Normierte Forward-Spalten aller Zeitpunkte und die Log-Likelihood, z. B. für den
+        Baum-Welch-E-Schritt. Engine "python": Liste von Spalten, "numpy": Array der Form (T, N).
+        """
+        length = len(codes)
+        if length == 0:
+            return ([] if self.engine == "python" else np.empty((0, self.model.n_states))), 0.0
+        _, buffer, log_likelihood = self._forward_pass(codes, length)
+        if self.engine == "numpy":
+            return buffer, log_likelihood
+        return [self._load(buffer, t) for t in range(length)], log_likelihood
+
+    # ---------- Forward-Durchlauf ----------
+    def _forward_pass(self, codes: Sequence[int], segment: Optional[int]):
+        """
+        Normierte Forward-Spalten für alle Zeitpunkte. Gespeichert werden die Spalten an den
+        Segmentanfängen (Checkpoints) und alle Spalten des letzten Segments (Puffer).
+        Mit segment=None wird nichts gespeichert (nur die Log-Likelihood).
+        Rückgabe: (Checkpoints, Puffer, Log-Likelihood).
+        """
+        length = len(codes)
+        column, log_likelihood = self._initial_column(codes[0])
+        checkpoints = buffer = None
+        if segment is not None:
+            checkpoints = self._new_table((length + segment - 1) // segment)
+            buffer = self._new_table(min(segment, length))
+        for t in range(length):
+            if t > 0:
+                column, log_scale = self._forward_step(column, codes[t])
+                log_likelihood += log_scale
+            if segment is not None:
+                offset = t % segment
+                if offset == 0:
+                    self._store(checkpoints, t // segment, column)
+                self._store(buffer, offset, column)
+        return checkpoints, buffer, log_likelihood
+
+    # Spaltentabellen: array('d') bzw. NumPy-Array, zeilenweise eine Spalte pro Zeitpunkt
+    def _new_table(self, rows: int):
+        """Tabelle für rows Spalten."""
+        n = self.model.n_states
+        if self.engine == "numpy":
+            return np.empty((rows, n))
+        return array("d", bytes(8 * rows * n))
+
+    def _store(self, table, row: int, column):
+        """Schreibt eine Spalte in Zeile row."""
+        if self.engine == "numpy":
+            table[row] = column
+        else:
+            n = self.model.n_states
+            table[row * n:(row + 1) * n] = array("d", column)
+
+    def _load(self, table, row: int):
+        """Liest die Spalte aus Zeile row."""
+        if self.engine == "numpy":
+            return table[row]
+        n = self.model.n_states
+        return table[row * n:(row + 1) * n]
+
+    def _initial_column(self, symbol: int):
+        """Normierte Spalte für t = 0 und der Logarithmus des Normierungsfaktors."""
+        if self.engine == "numpy":
+            column = self._start * self._emissions[symbol]
+        else:
+            column = list(map(mul, self.model.start, self._emit_cols[symbol]))
+        total = self._total(column)
+        return self._normalize(column, total), math.log(total)
+
+    def _forward_step(self, column, symbol: int):
+        """alpha_t[j] = (Σ_i alpha_{t-1}[i] · a_ij) · e_j(o_t), danach normiert."""
+        if self.engine == "numpy":
+            column = (column @ self._transitions) * self._emissions[symbol]
+        else:
+            column = [sum(map(mul, column, col)) * e for col, e in zip(self._trans_cols, self._emit_cols[symbol])]
+        total = self._total(column)
+        return self._normalize(column, total), math.log(total)
+
+    def _total(self, column) -> float:
+        """Summe einer Spalte; 0 bedeutet, dass die Sequenz unmöglich ist."""
+        total = float(column.sum()) if self.engine == "numpy" else sum(column)
+        if not total > 0.0:
+            raise ValueError("Kein gültiger Pfad gefunden.")
+        return total
+
+    def _normalize(self, column, total: float):
+        """Teilt eine Spalte durch total."""
+        if self.engine == "numpy":
+            return column / total
+        return [value / total for value in column]
+
+    # ---------- Backward-Durchlauf ----------
+    def _backward_pass(self, codes: Sequence[int], segment: int, checkpoints, buffer):
+        """
+        Liefert (t, Posterior-Spalte) für t = T-1 .. 0. Die Forward-Spalten eines Segments
+        werden aus dessen Checkpoint neu berechnet (das letzte Segment liegt bereits im Puffer).
+        """
+        length = len(codes)
+        segments = (length + segment - 1) // segment
+        beta = None
+        for index in range(segments - 1, -1, -1):
+            start = index * segment
+            end = min(start + segment, length)
+            if index < segments - 1:
+                # Forward-Spalten des Segments aus dem Checkpoint neu berechnen (identische Rechnung)
+                column = self._load(checkpoints, index)
+                self._store(buffer, 0, column)
+                for t in range(start + 1, end):
+                    column, _ = self._forward_step(column, codes[t])
+                    self._store(buffer, t - start, column)
+
+            for t in range(end - 1, start - 1, -1):
+                if beta is None:
+                    beta = self._ones()
+                else:
+                    beta = self.backward_step(beta, codes[t + 1])
+                yield t, self.posterior_column(self._load(buffer, t - start), beta)
+
+    def _ones(self):
+        """Backward-Spalte für t = T-1."""
+        if self.engine == "numpy":
+            return np.ones(self.model.n_states)
+        return [1.0] * self.model.n_states
+
+    def backward_step(self, beta, symbol: int):
+        """
+        beta_t[i] = Σ_j a_ij · e_j(o_{t+1}) · beta_{t+1}[j], danach normiert.
+        symbol ist o_{t+1}; die Rekursion beginnt mit beta_{T-1} = (1, …, 1).
+        """
+        if self.engine == "numpy":
+            beta = self._transitions @ (self._emissions[symbol] * beta)
+        else:
+            weighted = list(map(mul, self._emit_cols[symbol], beta))
+            beta = [sum(map(mul, row, weighted)) for row in self._trans_rows]
+        return self._normalize(beta, self._total(beta))
+
+    def posterior_column(self, alpha, beta) -> list:
+        """gamma_t[i] = alpha_t[i] · beta_t[i], normiert auf Summe 1."""
+        if self.engine == "numpy":
+            gamma = alpha * beta
+            return self._normalize(gamma, self._total(gamma)).tolist()
+        gamma = list(map(mul, alpha, beta))
+        return self._normalize(gamma, self._total(gamma))
@@ -1,12 +1,88 @@
+import math
 import random
-from typing import List, Tuple
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from typing import List, Optional, Tuple, Union
 from src.hidden_markov_model import HMM
+from src.compiled_hmm import CompiledHMM, index_array, index_typecode
+
+try:
+    import numpy as np
+except ImportError:  # NumPy ist optional und beschleunigt nur das Ziehen der Emissionen
+    np = None
+
+# Anzahl der Zufallszahlen, die mit NumPy auf einmal gezogen werden (begrenzt den Zwischenspeicher)
+_BLOCK_VALUES = 1 << 22
+# Bis zu dieser Anzahl an Tabellen wird pro Tabelle mit einer Maske gezogen, sonst über Indizierung
+_MASK_TABLES = 16
+
 
 class SequenceGenerator:
-    def __init__(self, hmm: HMM):
-        # Das HMM-Objekt, mit dem die Sequenzen generiert werden
+    """
+    Erzeugt Zufallssequenzen aus einem HMM.
+
+    Die Verteilungen werden einmal als kumulative Tabellen vorberechnet; gezogen wird
+    per Binärsuche (bisect) mit gleichverteilten Zufallszahlen. Die Zustandskette wird
+    in Läufen erzeugt: Die Verweildauer in einem Zustand ist geometrisch verteilt
+    (Selbstübergang), danach wird der nächste Zustand unter den übrigen gezogen. Das
+    ist exakt dieselbe Verteilung wie Schritt für Schritt, braucht aber nur eine
+    Iteration pro Lauf. Mit NumPy werden die Emissionen blockweise vektorisiert gezogen.
+
+    Mit seed sind die erzeugten Sequenzen reproduzierbar (bei gleicher Verfügbarkeit von NumPy).
+    """
+
+    def __init__(self, hmm: Union[HMM, CompiledHMM], seed: Optional[int] = None):
+        # Das HMM-Objekt (dict- oder array-basiert), mit dem die Sequenzen generiert werden
         self.hmm = hmm
+        self.model = hmm.compile()
+        self.seed = seed
+        self._random = random.Random(seed)
+        self._rng = np.random.default_rng(seed) if np is not None else None
+        self._prepare_tables()
+
+    def _prepare_tables(self):
+        """Berechnet kumulative Tabellen für Start, Emissionen, Verweildauer und Sprünge."""
+        model = self.model
+        n, m = model.n_states, model.n_symbols
+
+        self._start = self._cumulative(list(model.start))
+        self._emissions = [self._cumulative(list(model.emissions[i * m:(i + 1) * m])) for i in range(n)]
 
+        # Logarithmus der Wahrscheinlichkeit zu bleiben (relativ zur Zeilensumme) und
+        # Sprungverteilung ohne Selbstübergang. 0.0 = Zustand wird nie verlassen,
+        # -inf = Zustand wird immer sofort verlassen.
+        self._log_stay: List[float] = []
+        self._jumps = []
+        for i in range(n):
+            row = list(model.transitions[i * n:(i + 1) * n])
+            total = sum(row)
+            stay = min(row[i] / total, 1.0) if total > 0.0 else 0.0
+            self._log_stay.append(math.log(stay) if stay > 0.0 else float("-inf"))
+            row[i] = 0.0
+            self._jumps.append(self._cumulative(row))
+
+        # Dieselben Emissionstabellen als NumPy-Arrays für das vektorisierte Ziehen
+        self._emission_arrays = self._numpy_tables(self._emissions) if np is not None else None
+
+    @staticmethod
+    def _cumulative(weights: List[float]) -> Tuple[List[float], float, int]:
+        """
+        Kumulative Tabelle einer (nicht unbedingt normierten) Verteilung:
+        (kumulierte Gewichte, Gesamtsumme, Index des letzten Elements mit Gewicht > 0).
+        """
+        positive = [k for k, weight in enumerate(weights) if weight > 0.0]
+        last = positive[-1] if positive else -1
+        cumulative = list(accumulate(max(weight, 0.0) for weight in weights))
+        return cumulative, (cumulative[-1] if cumulative else 0.0), last
+
+    @staticmethod
+    def _draw(table: Tuple[List[float], float, int], u: float) -> int:
+        """Zieht einen Index aus einer kumulativen Tabelle mit einer Zufallszahl u aus [0, 1)."""
+        cumulative, total, last = table
+        return min(bisect_right(cumulative, u * total), last)
+
+    # ---------- Öffentliche Schnittstelle ----------
     def generate_sequence(self, length: int) -> Tuple[List[str], List[str]]:
         """
         Generiert eine Zufallssequenz basierend auf dem HMM.
@@ -14,40 +90,179 @@ class SequenceGenerator:
         - observations: erzeugte Beobachtungssymbole
         - states: die tatsächlichen Zustände, die für die Beobachtungen verantwortlich waren
         """
-        states = []
-        observations = []
+        observations, states = self.generate_encoded(length)
+        return self.model.symbol_names(observations), self.model.state_names(states)
+
+    def generate_encoded(self, length: int) -> Tuple[array, array]:
+        """
+        Wie generate_sequence, aber mit kompakten Index-Arrays (Symbol- bzw. Zustands-Indizes
+        des kompilierten Modells), z. B. direkt für ViterbiDecoder.decode_encoded.
+        """
+        if length <= 0:
+            return index_array(self.model.n_symbols, 0), index_array(self.model.n_states, 0)
+        states = self._sample_states(length)
+        return self._sample_emissions(states), states
+
+    def generate_many(self, count: int, length: int) -> List[Tuple[array, array]]:
+        """
+        Erzeugt count Sequenzen der Länge length als Liste von (Beobachtungen, Zustände).
+        Mit NumPy werden alle Sequenzen gemeinsam Zeitschritt für Zeitschritt gezogen.
+        """
+        if np is None or count <= 1 or length <= 0:
+            return [self.generate_encoded(length) for _ in range(count)]
 
-        # Startzustand wählen basierend auf den Startwahrscheinlichkeiten des HMM
-        start_state = self._weighted_choice({
-            state: self.hmm.get_start_prob_normal(state)
-            for state in self.hmm.states
-        })
-        states.append(start_state)
+        n = self.model.n_states
+        if self._start[2] < 0:
+            raise ValueError("Die Startwahrscheinlichkeiten sind alle 0.")
+        start_table = self._numpy_tables([self._start])
+        transition_tables = self._numpy_tables([self._transition_table(i) for i in range(n)])
 
-        # Erste Emission aus dem Startzustand generieren
-        first_obs = self._weighted_choice(self.hmm.get_emission_row(start_state))
-        observations.append(first_obs)
+        # Zustandsketten aller Sequenzen gleichzeitig: (count, length)
+        states = np.empty((count, length), dtype=np.dtype(index_typecode(n)))
+        states[:, 0] = self._draw_vectorized(start_table, np.zeros(count, dtype=np.intp))
+        for t in range(1, length):
+            states[:, t] = self._draw_vectorized(transition_tables, states[:, t - 1])
 
-        # Wiederholt: neuen Zustand und zugehörige Emission erzeugen
-        current_state = start_state
-        for _ in range(1, length):
-            # Übergang zum nächsten Zustand (gewichtete Zufallsauswahl)
-            current_state = self._weighted_choice(self.hmm.get_transition_row(current_state))
-            states.append(current_state)
+        results = []
+        for row in states:
+            state_codes = index_array(n, length)
+            np.frombuffer(state_codes, dtype=states.dtype)[:] = row
+            results.append((self._sample_emissions(state_codes), state_codes))
+        return results
 
-            # Neue Beobachtung aus dem aktuellen Zustand erzeugen
-            obs = self._weighted_choice(self.hmm.get_emission_row(current_state))
-            observations.append(obs)
+    # ---------- Ziehen der Zustände und Emissionen ----------
+    def _sample_states(self, length: int) -> array:
+        """Erzeugt die Zustandskette lauf-weise (geometrische Verweildauer + Sprung)."""
+        if self._start[2] < 0:
+            raise ValueError("Die Startwahrscheinlichkeiten sind alle 0.")
+        if np is not None:
+            return self._sample_states_numpy(length)
 
-        return observations, states
+        n = self.model.n_states
+        rand = self._random.random
+        log = math.log
+        states = index_array(n, 0)
+        # Ein Lauf wird als wiederholtes Ein-Element-Array angehängt (Kopie in C statt Schleife)
+        units = [array(states.typecode, (i,)) for i in range(n)]
 
-    def _weighted_choice(self, distribution: dict) -> str:
+        state = self._draw(self._start, rand())
+        t = 0
+        while True:
+            remaining = length - t
+            log_stay = self._log_stay[state]
+            if log_stay == 0.0:
+                dwell = remaining
+            else:
+                # Inverse Verteilungsfunktion der geometrischen Verteilung (1 - u liegt in (0, 1]);
+                # bei log_stay = -inf ergibt sich genau 1
+                dwell = 1 + int(log(1.0 - rand()) / log_stay)
+            dwell = min(dwell, remaining)
+            states.extend(units[state] * dwell)
+            t += dwell
+            if t >= length:
+                return states
+            state = self._jump(state, rand())
+
+    def _sample_states_numpy(self, length: int) -> array:
         """
-        Wählt zufällig ein Element aus einer Wahrscheinlichkeitsverteilung (dictionary).
-        - distribution: {Element: Wahrscheinlichkeit}
+        Wie _sample_states, aber blockweise: Zuerst wird nur die Folge der Läufe (Sprünge)
+        in Python gezogen, Verweildauern und das Auffüllen erfolgen vektorisiert.
         """
-        elements = list(distribution.keys())    # Mögliche Optionen
-        weights = list(distribution.values())   # Zugehörige Wahrscheinlichkeiten
-        return random.choices(elements, weights=weights, k=1)[0]
+        n = self.model.n_states
+        rand = self._random.random
+        log_stay = np.array(self._log_stay, dtype=np.float64)
+        mean_dwell = max(1.0, float(np.mean(-1.0 / log_stay[log_stay < 0.0]))) if (log_stay < 0.0).any() else 1.0
+
+        states = index_array(n, length)
+        out = np.frombuffer(states, dtype=np.dtype(states.typecode))
+        state = self._draw(self._start, rand())
+        t = 0
+        while True:
+            # Folge der Laufzustände; ein Zustand, der nicht verlassen wird oder werden kann, beendet den Block
+            runs = min(1 << 20, int((length - t) / mean_dwell) + 16)
+            run_states = [state]
+            while len(run_states) < runs and self._log_stay[state] != 0.0 and self._jumps[state][2] >= 0:
+                state = self._jump(state, rand())
+                run_states.append(state)
+            run_states = np.array(run_states, dtype=np.intp)
+
+            # Geometrische Verweildauern aller Läufe auf einmal (log_stay = 0 → bis zum Ende)
+            remaining = length - t
+            with np.errstate(divide="ignore", invalid="ignore"):
+                dwell = np.floor(np.log(1.0 - self._rng.random(len(run_states))) / log_stay[run_states]) + 1.0
+            dwell = np.where(log_stay[run_states] == 0.0, remaining, np.minimum(dwell, remaining))
+            ends = np.cumsum(dwell.astype(np.int64))
+
+            # Nur die Läufe bis zum Erreichen der Länge verwenden
+            used = int(np.searchsorted(ends, remaining)) + 1
+            if used <= len(run_states):
+                dwell = dwell[:used].astype(np.int64)
+                dwell[-1] -= ends[used - 1] - remaining
+                out[t:] = np.repeat(run_states[:used], dwell)
+                return states
 
+            out[t:t + ends[-1]] = np.repeat(run_states, dwell.astype(np.int64))
+            t += int(ends[-1])
+            state = self._jump(int(run_states[-1]), rand())
 
+    def _jump(self, state: int, u: float) -> int:
+        """Zieht den nächsten Zustand nach dem Verlassen von state."""
+        jump = self._jumps[state]
+        if jump[2] < 0:
+            raise ValueError(f"Zustand '{self.model.states[state]}' hat keine ausgehenden Übergänge.")
+        return self._draw(jump, u)
+
+    def _sample_emissions(self, states: array) -> array:
+        """Zieht zu jeder Position der Zustandskette ein Symbol."""
+        m = self.model.n_symbols
+        length = len(states)
+        observations = index_array(m, length)
+
+        if np is None:
+            rand = self._random.random
+            draw = self._draw
+            tables = self._emissions
+            return array(observations.typecode, [draw(tables[state], rand()) for state in states])
+
+        out = np.frombuffer(observations, dtype=np.dtype(observations.typecode))
+        state_codes = np.frombuffer(states, dtype=np.dtype(states.typecode))
+        block = max(1, _BLOCK_VALUES // max(m, 1))
+        for start in range(0, length, block):
+            end = min(start + block, length)
+            out[start:end] = self._draw_vectorized(self._emission_arrays, state_codes[start:end])
+        return observations
+
+    def _transition_table(self, state: int) -> Tuple[List[float], float, int]:
+        """Kumulative Tabelle der vollständigen Übergangszeile (inklusive Selbstübergang)."""
+        n = self.model.n_states
+        table = self._cumulative(list(self.model.transitions[state * n:(state + 1) * n]))
+        if table[2] < 0:
+            raise ValueError(f"Zustand '{self.model.states[state]}' hat keine ausgehenden Übergänge.")
+        return table
+
+    @staticmethod
+    def _numpy_tables(tables):
+        """Fasst kumulative Tabellen gleicher Länge zu NumPy-Arrays zusammen (Gewichte, Summen, letzter Index)."""
+        return (
+            np.array([table[0] for table in tables], dtype=np.float64),
+            np.array([table[1] for table in tables], dtype=np.float64),
+            np.array([table[2] for table in tables], dtype=np.intp),
+        )
+
+    def _draw_vectorized(self, tables, rows):
+        """
+        Zieht für jeden Eintrag von rows einen Index aus der Tabelle rows[b] (NumPy).
+        Entspricht _draw: Anzahl der kumulierten Gewichte <= u * Summe, begrenzt auf den letzten gültigen Index.
+        """
+        cumulative, totals, last = tables
+        u = self._rng.random(len(rows))
+        if len(totals) <= _MASK_TABLES:
+            # Wenige Tabellen: je Tabelle eine Maske und eine Binärsuche
+            drawn = np.empty(len(rows), dtype=np.intp)
+            for index in range(len(totals)):
+                mask = rows == index
+                drawn[mask] = np.searchsorted(cumulative[index], u[mask] * totals[index], side="right")
+        else:
+            rows = np.asarray(rows, dtype=np.intp)
+            drawn = (cumulative[rows] <= (u * totals[rows])[:, None]).sum(axis=1)
+        return np.minimum(drawn, last[rows])
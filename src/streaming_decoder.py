@@ -0,0 +1,191 @@
+from array import array
+from typing import Iterable, Iterator, List, Optional, Union
+from src.hidden_markov_model import HMM
+from src.compiled_hmm import CompiledHMM, index_array
+from src.viterbi_decoder import ViterbiDecoder
+
+
+class StreamingViterbiDecoder:
+    """
+    Online-Viterbi für (potenziell unendliche) Beobachtungsströme.
+
+    Symbole werden einzeln mit feed() übergeben. Nach jedem Schritt wird geprüft, ob
+    die Backpointer-Ketten aller noch möglichen Zustände in einem gemeinsamen Vorgänger
+    zusammenlaufen. Ab diesem Punkt kann sich der Pfad nicht mehr ändern, die
+    entsprechenden Zustände werden sofort ausgegeben und ihre Backpointer verworfen.
+    Das Ergebnis ist identisch zur vollständigen Dekodierung mit ViterbiDecoder.
+
+    Für jeden offenen Zeitpunkt wird die Menge der Zustände gehalten, die noch Vorgänger
+    eines möglichen aktuellen Zustands sind. Ein neues Symbol verkleinert diese Mengen
+    nur rückwärts, solange sich etwas ändert; der Aufwand ist damit amortisiert O(N)
+    pro Symbol statt O(offene Zeitpunkte · N).
+
+    Ohne max_lag wachsen Speicher und Latenz mit der Anzahl offener Zeitpunkte (laufen
+    die Ketten nie zusammen, bis zum Ende des Stroms). Nur mit max_lag sind sie begrenzt:
+    Sind mehr als max_lag Zustände offen, werden die ältesten anhand des aktuell besten
+    Zustands festgelegt. Das kann vom exakten Viterbi-Pfad abweichen.
+    """
+
+    def __init__(self, hmm: Union[HMM, CompiledHMM], use_log: bool = True, max_lag: Optional[int] = None,
+                 numeric_mode: Optional[str] = None):
+        if max_lag is not None and max_lag < 1:
+            raise ValueError("max_lag muss mindestens 1 sein.")
+        self.model = hmm.compile()
+        self.max_lag = max_lag
+
+        # Gleiche Rechenschritte wie die Engine "backpointer"
+        self._decoder = ViterbiDecoder(self.model, use_log=use_log, engine="backpointer", numeric_mode=numeric_mode)
+        self.use_log = self._decoder.use_log
+        self._invalid = float("-inf") if self.use_log else 0.0
+        self.reset()
+
+    def reset(self):
+        """Setzt den Decoder für einen neuen Strom zurück (inklusive Statistik)."""
+        self._reset_stream()
+
+        # Statistik
+        self.max_pending = 0
+        self.forced = 0
+
+    def _reset_stream(self):
+        """Verwirft den Zustand des aktuellen Stroms."""
+        self._column: Optional[List[float]] = None
+        self._time = -1        # Zeitpunkt der aktuellen Spalte
+        self._emitted = 0      # Anzahl bereits festgelegter Zustände
+        self._rows: List[array] = []  # Backpointer-Zeilen für die Zeitpunkte _row_base .. _time
+        self._row_base = 1     # Zeitpunkt der ersten gespeicherten Zeile (höchstens _emitted + 1)
+        # Mögliche Vorgänger-Zustände je offenem Zeitpunkt _emitted .. _time (Index time - _emitted)
+        self._alive: List[set] = []
+
+    @property
+    def pending(self) -> int:
+        """Anzahl der Zeitpunkte, deren Zustand noch nicht festgelegt ist."""
+        return self._time + 1 - self._emitted
+
+    # ---------- Öffentliche Schnittstelle ----------
+    def feed(self, symbol: str) -> List[str]:
+        """Verarbeitet ein Symbol und gibt die dadurch neu festgelegten Zustände zurück."""
+        try:
+            code = self.model.symbol_index[symbol]
+        except KeyError:
+            raise ValueError(f"Symbol '{symbol}' nicht im Emissionsmodell enthalten.")
+        return self.model.state_names(self.feed_encoded(code))
+
+    def feed_encoded(self, code: int) -> List[int]:
+        """Wie feed, aber mit Symbol-Index und Zustands-Indizes."""
+        n = self.model.n_states
+        if self._column is None:
+            self._column, _ = self._decoder.initial_column(code)
+            self._time = 0
+        else:
+            row = index_array(n, n)
+            self._column, _ = self._decoder.forward((code,), 0, 1, self._column, row, 0)
+            self._rows.append(row)
+            self._time += 1
+
+        survivors = {j for j, value in enumerate(self._column) if value > self._invalid}
+        if not survivors:
+            raise ValueError("Kein gültiger Pfad gefunden.")
+        self._alive.append(survivors)
+
+        self.max_pending = max(self.max_pending, self.pending)
+        finalized = self._emit_converged()
+        if self.max_lag is not None and self.pending > self.max_lag:
+            finalized += self._emit_forced(self.pending - self.max_lag)
+        return finalized
+
+    def finish(self) -> List[str]:
+        """Beendet den Strom: legt alle offenen Zustände über den besten Endzustand fest."""
+        return self.model.state_names(self.finish_encoded())
+
+    def finish_encoded(self) -> List[int]:
+        """Wie finish, aber mit Zustands-Indizes."""
+        if self._column is None:
+            return []
+        finalized = self._emit_forced(self.pending)
+        self._reset_stream()
+        return finalized
+
+    def decode_stream(self, symbols: Iterable[str]) -> Iterator[str]:
+        """
+        Dekodiert einen Strom von Symbolen (z. B. Zeichen aus einer Datei) und liefert
+        jeden Zustand, sobald er feststeht. Am Ende des Stroms wird der Rest ausgegeben.
+        """
+        self.reset()
+        for symbol in symbols:
+            yield from self.feed(symbol)
+        yield from self.finish()
+
+    def decode_encoded_stream(self, codes: Iterable[int]) -> Iterator[int]:
+        """Wie decode_stream, aber für Symbol-Indizes; liefert Zustands-Indizes."""
+        self.reset()
+        for code in codes:
+            yield from self.feed_encoded(code)
+        yield from self.finish_encoded()
+
+    # ---------- Interne Hilfsmethoden ----------
+    def _emit_converged(self) -> List[int]:
+        """
+        Aktualisiert die Vorgänger-Mengen rückwärts, solange sie kleiner werden, und legt
+        alles bis zum letzten Zeitpunkt mit nur einem möglichen Zustand fest.
+
+        Die Mengen können nur schrumpfen: Bleibt eine Menge unverändert, gilt das auch für
+        alle älteren, und die Suche endet. Alle offenen Mengen haben nach jedem Schritt mehr
+        als ein Element (sonst wären sie festgelegt), ein neuer Zusammenlauf kann also nur
+        im aktualisierten Bereich liegen.
+        """
+        alive = self._alive
+        index = len(alive) - 1
+        current = alive[index]
+        merged = index if len(current) == 1 else None
+        while index > 0 and merged is None:
+            row = self._rows[self._emitted + index - self._row_base]
+            previous = {row[j] for j in current}
+            if len(previous) == len(alive[index - 1]):
+                break
+            index -= 1
+            alive[index] = current = previous
+            if len(previous) == 1:
+                merged = index
+
+        if merged is None:
+            return []
+        # Zustand zum Zeitpunkt _emitted + merged steht fest, damit auch alle davor
+        state = next(iter(alive[merged]))
+        return self._emit_until(self._emitted + merged, state)
+
+    def _emit_forced(self, count: int) -> List[int]:
+        """Legt die ältesten count offenen Zustände anhand des aktuell besten Endzustands fest."""
+        if count <= 0:
+            return []
+        column = self._column
+        state = max(range(len(column)), key=column.__getitem__)
+        time = self._time
+        # Bis zum letzten festzulegenden Zeitpunkt zurückverfolgen
+        target = self._emitted + count - 1
+        while time > target:
+            state = self._rows[time - self._row_base][state]
+            time -= 1
+        if count < self.pending:
+            self.forced += count
+        return self._emit_until(target, state)
+
+    def _emit_until(self, time: int, state: int) -> List[int]:
+        """
+        Gibt die Zustände für die Zeitpunkte _emitted..time zurück, wobei state der
+        Zustand zum Zeitpunkt time ist, und verwirft die nicht mehr benötigten Backpointer.
+        """
+        emitted = self._emitted
+        del self._alive[:time - emitted + 1]
+        states = [0] * (time - emitted + 1)
+        states[-1] = state
+        for t in range(time, emitted, -1):
+            state = self._rows[t - self._row_base][state]
+            states[t - emitted - 1] = state
+
+        # Zeilen bis einschließlich Zeitpunkt time werden nicht mehr benötigt
+        dropped = min(max(0, time - self._row_base + 1), len(self._rows))
+        del self._rows[:dropped]
+        self._row_base += dropped
+        self._emitted = time + 1
+        return states
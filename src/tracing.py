@@ -0,0 +1,192 @@
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+
+class Tracer:
+    """
+    Schnittstelle für Tracing/Instrumentierung des ViterbiDecoders.
+
+    Alle Methoden sind No-Ops, d. h. eine Instanz dieser Klasse kann direkt als
+    "stiller" Tracer verwendet werden. Eigene Tracer überschreiben nur die Hooks,
+    die sie benötigen.
+
+    Die Zell-Hooks (on_init, on_cell_begin, on_candidate, on_cell_end) werden nur von
+    der Lehrversion ("classic") aufgerufen, die Phasen-Hooks von allen Engines.
+    """
+
+    # ---------- Gesamter Dekodierlauf ----------
+    def on_decode_begin(self, length: int, n_states: int, engine: str):
+        """Wird vor der Dekodierung einer Sequenz der Länge length aufgerufen."""
+
+    def on_decode_end(self):
+        """Wird nach erfolgreicher Dekodierung aufgerufen."""
+
+    # ---------- Phasen (Initialisierung, Rekursion, Traceback) ----------
+    def begin_phase(self, name: str):
+        """Beginn einer Phase des Algorithmus."""
+
+    def end_phase(self, name: str, cells: int = 0):
+        """Ende einer Phase; cells = Anzahl der in dieser Phase berechneten Trellis-Zellen."""
+
+    def record_counters(self, counters: Dict[str, int]):
+        """Zusätzliche Zähler einer Engine (z. B. Anzahl verworfener Zellen)."""
+
+    # ---------- Einzelne Trellis-Zellen (nur "classic") ----------
+    def on_init(self, state: str, start_p: float, emit_p: float, value: float, use_log: bool):
+        """Initialisierung einer Zelle zum Zeitpunkt t = 0."""
+
+    def on_cell_begin(self, t: int, curr_state: str, observation: str):
+        """Beginn der Berechnung der Zelle (t, curr_state)."""
+
+    def on_candidate(self, t: int, prev_state: str, curr_state: str,
+                     prev_v: float, trans_p: float, emit_p: float, prob: float, use_log: bool):
+        """Ein möglicher Vorgänger prev_state für die Zelle (t, curr_state)."""
+
+    def on_cell_end(self, t: int, curr_state: str, best_prev: str, best_prob: float):
+        """Bester Vorgänger und Wert der Zelle (t, curr_state)."""
+
+
+class ConsoleTracer(Tracer):
+    """Gibt jede Zelle der Trellis auf der Konsole aus (ursprüngliches Verhalten des Decoders)."""
+
+    def on_init(self, state, start_p, emit_p, value, use_log):
+        if use_log:
+            print(f"V[{state}] = log({start_p:.4f}) + log({emit_p:.4f}) = {value:.4f}")
+        else:
+            print(f"V[{state}] = {start_p:.4f} * {emit_p:.4f} = {value:.6f}")
+
+    def on_cell_begin(self, t, curr_state, observation):
+        print(f"\n[t={t}] Zielzustand: {curr_state} | Beobachtung: {observation}")
+
+    def on_candidate(self, t, prev_state, curr_state, prev_v, trans_p, emit_p, prob, use_log):
+        if use_log:
+            print(f"  {prev_state} → {curr_state}: {prev_v:.4f} + {trans_p:.4f} + {emit_p:.4f} = {prob:.4f}")
+        else:
+            print(f"  {prev_state} → {curr_state}: {prev_v:.6f} * {trans_p:.4f} * {emit_p:.4f} = {prob:.6f}")
+
+    def on_cell_end(self, t, curr_state, best_prev, best_prob):
+        print(f"  ➤ Bester vorheriger Zustand: {best_prev} mit Wahrscheinlichkeit {best_prob:.6f}")
+
+
+class RecordingTracer(Tracer):
+    """
+    Sammelt strukturierte Datensätze statt sie auszugeben:
+    - records: ein Dictionary pro Trellis-Zelle (Zeitpunkt, Zustand, Kandidaten, bester Vorgänger)
+    - phases:  Name und Zellanzahl jeder abgeschlossenen Phase
+    - counters: von den Engines gemeldete Zähler
+    """
+
+    def __init__(self):
+        self.records: List[dict] = []
+        self.phases: List[dict] = []
+        self.counters: Dict[str, int] = {}
+        self._current: Optional[dict] = None
+
+    def on_init(self, state, start_p, emit_p, value, use_log):
+        self.records.append({
+            "t": 0, "state": state, "start": start_p, "emission": emit_p, "value": value,
+        })
+
+    def on_cell_begin(self, t, curr_state, observation):
+        self._current = {"t": t, "state": curr_state, "observation": observation, "candidates": []}
+
+    def on_candidate(self, t, prev_state, curr_state, prev_v, trans_p, emit_p, prob, use_log):
+        self._current["candidates"].append({
+            "prev_state": prev_state, "prev_value": prev_v,
+            "transition": trans_p, "emission": emit_p, "value": prob,
+        })
+
+    def on_cell_end(self, t, curr_state, best_prev, best_prob):
+        self._current["best_prev"] = best_prev
+        self._current["value"] = best_prob
+        self.records.append(self._current)
+        self._current = None
+
+    def end_phase(self, name, cells=0):
+        self.phases.append({"phase": name, "cells": cells})
+
+    def record_counters(self, counters):
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+
+class TimingTracer(Tracer):
+    """
+    Misst die Laufzeit jeder Phase, den Durchsatz in Zellen pro Sekunde und optional
+    den Spitzenspeicherverbrauch (über tracemalloc, verlangsamt die Ausführung merklich).
+    Mehrere Dekodierläufe werden aufsummiert.
+    """
+
+    def __init__(self, track_memory: bool = False):
+        self.track_memory = track_memory
+        self.phase_times: Dict[str, float] = {}
+        self.phase_cells: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {}
+        self.total_time = 0.0
+        self.total_cells = 0
+        self.runs = 0
+        self.peak_memory = 0
+        self._phase_start: Dict[str, float] = {}
+        self._decode_start = 0.0
+        self._started_tracemalloc = False
+
+    def on_decode_begin(self, length, n_states, engine):
+        self.total_cells += length * n_states
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        if self.track_memory:
+            tracemalloc.reset_peak()
+        self._decode_start = time.perf_counter()
+
+    def on_decode_end(self):
+        self.total_time += time.perf_counter() - self._decode_start
+        self.runs += 1
+        if self.track_memory:
+            self.peak_memory = max(self.peak_memory, tracemalloc.get_traced_memory()[1])
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+
+    def begin_phase(self, name):
+        self._phase_start[name] = time.perf_counter()
+
+    def end_phase(self, name, cells=0):
+        elapsed = time.perf_counter() - self._phase_start.pop(name)
+        self.phase_times[name] = self.phase_times.get(name, 0.0) + elapsed
+        self.phase_cells[name] = self.phase_cells.get(name, 0) + cells
+
+    def record_counters(self, counters):
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    @property
+    def cells_per_second(self) -> float:
+        """Durchsatz über alle Läufe (Trellis-Zellen pro Sekunde)."""
+        return self.total_cells / self.total_time if self.total_time > 0 else 0.0
+
+    def report(self) -> dict:
+        """Gibt die gesammelten Messwerte als Dictionary zurück."""
+        return {
+            "runs": self.runs,
+            "total_time": self.total_time,
+            "total_cells": self.total_cells,
+            "cells_per_second": self.cells_per_second,
+            "phase_times": dict(self.phase_times),
+            "phase_cells": dict(self.phase_cells),
+            "peak_memory": self.peak_memory if self.track_memory else None,
+            "counters": dict(self.counters),
+        }
+
+    def summary(self) -> str:
+        """Kurze, lesbare Zusammenfassung der Messwerte."""
+        lines = [f"Läufe: {self.runs}, Gesamtzeit: {self.total_time:.4f} s, "
+                 f"{self.cells_per_second:,.0f} Zellen/s"]
+        for name, seconds in self.phase_times.items():
+            lines.append(f"  {name}: {seconds:.4f} s ({self.phase_cells.get(name, 0)} Zellen)")
+        if self.track_memory:
+            lines.append(f"  Spitzenspeicher: {self.peak_memory / 1024:.1f} KiB")
+        for key, value in self.counters.items():
+            lines.append(f"  {key}: {value}")
+        return "\n".join(lines)
@@ -1,11 +1,103 @@
-from typing import List, Dict
+import math
+import os
+from array import array
+from typing import List, Dict, Optional, Sequence, Tuple, Union
 from src.hidden_markov_model import HMM
+from src.compiled_hmm import CompiledHMM, index_array, index_typecode
+from src.tracing import Tracer
+from src.decode_state import DecodeState
+
+try:
+    import numpy as np
+except ImportError:  # NumPy ist optional und wird nur für die Engine "numpy" benötigt
+    np = None
 
 class ViterbiDecoder:
-    def __init__(self, hmm: HMM, use_log: bool = False):
-        # HMM-Objekt speichern und einstellen, ob Log-Wahrscheinlichkeiten genutzt werden sollen
+    # Verfügbare Engines:
+    # - "classic":     ursprüngliche Lehrversion mit Pfadlisten und Ausgabe jeder Trellis-Zelle
+    # - "backpointer": kompakte Backpointer-Tabelle (T×N, uint8/uint16) und einmaliger Traceback
+    # - "numpy":       wie "backpointer", aber jeder Zeitschritt als ein vektorisiertes max/argmax
+    #                  über die N×N-Übergangsmatrix (für Modelle mit vielen Zuständen)
+    # - "checkpoint":  speicherbegrenzt; hält nur Spalten an Checkpoints und berechnet
+    #                  die Backpointer beim Traceback segmentweise neu
+    # - "parallel":    eine lange Sequenz auf mehrere Prozesse verteilt (Max-Plus-Scan über Abschnitte)
+    # - "sparse":      nur Übergänge mit Wahrscheinlichkeit > 0 und nur aktive Zustände;
+    #                  optional Beam-Pruning (beam_width) bzw. Top-K-Pruning (top_k)
+    ENGINES = ("classic", "backpointer", "numpy", "checkpoint", "parallel", "sparse")
+
+    # Zahlendarstellungen:
+    # - "normal": direkte Wahrscheinlichkeiten (Underflow bei langen Sequenzen)
+    # - "log":    Log-Wahrscheinlichkeiten, Produkte werden zu Summen
+    # - "scaled": direkte Wahrscheinlichkeiten; fällt das Maximum einer Spalte unter RESCALE_BELOW,
+    #             wird die Spalte durch ihr Maximum geteilt und der Logarithmus des Faktors
+    #             aufsummiert (kein Underflow, kein log pro Zelle)
+    NUMERIC_MODES = ("normal", "log", "scaled")
+    RESCALE_BELOW = 1e-100
+
+    def __init__(self, hmm: Union[HMM, CompiledHMM], use_log: bool = False, engine: str = "classic",
+                 tracer: Optional[Tracer] = None, memory_limit: Optional[int] = None,
+                 workers: Optional[int] = None, beam_width: Optional[float] = None,
+                 top_k: Optional[int] = None, numeric_mode: Optional[str] = None, cache=None):
+        # HMM-Objekt speichern und einstellen, ob Log-Wahrscheinlichkeiten genutzt werden sollen.
+        # numeric_mode hat Vorrang vor use_log (use_log=True entspricht "log").
         self.hmm = hmm
-        self.use_log = use_log
+        if numeric_mode is None:
+            numeric_mode = "log" if use_log else "normal"
+        if numeric_mode not in self.NUMERIC_MODES:
+            raise ValueError(f"Unbekannte Zahlendarstellung '{numeric_mode}'. Erlaubt: {', '.join(self.NUMERIC_MODES)}")
+        self.numeric_mode = numeric_mode
+        self.use_log = numeric_mode == "log"
+        self.scaled = numeric_mode == "scaled"
+
+        # Tracer für Ausgabe/Messungen; standardmäßig still (No-Op)
+        self.tracer = tracer if tracer is not None else Tracer()
+
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unbekannte Engine '{engine}'. Erlaubt: {', '.join(self.ENGINES)}")
+        if engine == "numpy" and np is None:
+            raise ImportError("Die Engine 'numpy' benötigt NumPy (pip install numpy).")
+        if engine == "parallel" and not self.use_log:
+            raise ValueError("Die Engine 'parallel' arbeitet nur mit logarithmischen Wahrscheinlichkeiten (use_log=True).")
+        if engine == "classic" and self.scaled:
+            raise ValueError("Die Lehrversion 'classic' unterstützt die Zahlendarstellung 'scaled' nicht.")
+        self.engine = engine
+
+        # Speicherlimit in Bytes für die Engine "checkpoint" (None → √T Checkpoints)
+        self.memory_limit = memory_limit
+
+        # Anzahl der Prozesse für die Engine "parallel" (None → Anzahl CPU-Kerne)
+        self.workers = workers
+
+        # Pruning für die Engine "sparse": Zustände, deren Log-Wahrscheinlichkeit mehr als
+        # beam_width unter der besten liegt bzw. die nicht zu den top_k besten gehören, werden verworfen
+        if beam_width is not None and beam_width < 0:
+            raise ValueError("beam_width darf nicht negativ sein.")
+        if top_k is not None and top_k < 1:
+            raise ValueError("top_k muss mindestens 1 sein.")
+        self.beam_width = beam_width
+        self.top_k = top_k
+
+        # Optionaler DecodeCache (src/decode_cache.py): wiederholte Dekodierungen derselben
+        # kodierten Sequenz werden aus dem Cache beantwortet ("classic" mit Ausgabe ausgenommen)
+        self.cache = cache
+
+        # Kompilierte Darstellung: Log-Werte werden einmal vorberechnet statt bei jedem Zugriff
+        self.model = hmm.compile()
+
+    def settings(self) -> dict:
+        """
+        Einstellungen des Decoders als Dictionary (ohne Modell und Tracer), z. B. um in
+        einem anderen Prozess einen gleich konfigurierten Decoder zu erzeugen:
+        ViterbiDecoder(model, **decoder.settings()).
+        """
+        return {
+            "engine": self.engine,
+            "numeric_mode": self.numeric_mode,
+            "memory_limit": self.memory_limit,
+            "workers": self.workers,
+            "beam_width": self.beam_width,
+            "top_k": self.top_k,
+        }
 
     def decode(self, observations: List[str]) -> List[str]:
         """
@@ -14,35 +106,630 @@ class ViterbiDecoder:
         """
         if not observations:
             return []
-        
+
+        if self.engine == "classic":
+            self.tracer.on_decode_begin(len(observations), self.model.n_states, self.engine)
+            path = self._decode_classic(observations)
+            self.tracer.on_decode_end()
+            return path
+
+        codes = self.model.encode(observations)
+        return self.model.state_names(self.decode_encoded(codes))
+
+    def decode_encoded(self, codes: Sequence[int]) -> array:
+        """
+        Dekodiert eine bereits kodierte Beobachtungssequenz (Symbol-Indizes des
+        kompilierten Modells) und gibt die Zustands-Indizes als kompaktes Array zurück.
+        """
+        path, _ = self._run(codes)
+        return path
+
+    def decode_encoded_with_log_probability(self, codes: Sequence[int]) -> Tuple[array, float]:
+        """Wie decode_encoded, gibt zusätzlich die Log-Wahrscheinlichkeit des besten Pfades zurück."""
+        if len(codes) == 0:
+            return index_array(self.model.n_states, 0), 0.0
+        return self._run(codes)
+
+    def decode_with_log_probability(self, observations: List[str]) -> Tuple[List[str], float]:
+        """
+        Wie decode, gibt zusätzlich den Logarithmus der Wahrscheinlichkeit des besten Pfades zurück.
+        """
+        if not observations:
+            return [], 0.0
+        path, log_prob = self._run(self.model.encode(observations))
+        return self.model.state_names(path), log_prob
+
+    def decode_many(self, sequences, workers: Optional[int] = None, ordered: bool = True,
+                    chunk_symbols: int = 100_000, stats=None, encoded: bool = False):
+        """
+        Dekodiert viele unabhängige Sequenzen parallel in einem Prozess-Pool
+        (siehe src/batch_decoder.py). Liefert die Pfade als Generator.
+        """
+        from src.batch_decoder import decode_many
+        return decode_many(self, sequences, workers=workers, ordered=ordered,
+                           chunk_symbols=chunk_symbols, stats=stats, encoded=encoded)
+
+    def decode_batch(self, sequences, stats=None) -> List[List[str]]:
+        """
+        Dekodiert Sequenzen gleicher Länge gemeinsam als eine vektorisierte
+        3-D-Array-Operation (benötigt NumPy, siehe src/batch_decoder.py).
+        """
+        from src.batch_decoder import decode_batch
+        return decode_batch(self, sequences, stats=stats)
+
+    def _run(self, codes: Sequence[int]) -> Tuple[array, float]:
+        """
+        Führt die gewählte Engine auf kodierten Beobachtungen aus.
+        Für kodierte Eingaben wird "classic" durch "backpointer" ersetzt (keine Ausgabe; gleiches
+        Ergebnis, nur unerreichbare Einzelzellen führen dort nicht zum Abbruch).
+        """
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(self.model, self.settings(), codes)
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.tracer.record_counters({"cache_hits": 1})
+                # Kopie, damit Änderungen am Ergebnis den Cache nicht verändern
+                return array(cached[0].typecode, cached[0]), cached[1]
+            self.tracer.record_counters({"cache_misses": 1})
+
+        self.tracer.on_decode_begin(len(codes), self.model.n_states, self.engine)
+        if self.engine == "numpy":
+            result = self._decode_numpy(codes)
+        elif self.engine == "checkpoint":
+            result = self._decode_checkpoint(codes)
+        elif self.engine == "parallel":
+            result = self._decode_parallel(codes)
+        elif self.engine == "sparse":
+            result = self._decode_sparse(codes)
+        else:
+            result = self._decode_backpointer(codes)
+        self.tracer.on_decode_end()
+
+        if key is not None:
+            self.cache.put(key, array(result[0].typecode, result[0]), result[1])
+        return result
+
+    # ---------- Inkrementelle Dekodierung ----------
+    def start(self, observations: Sequence[str] = ()) -> DecodeState:
+        """
+        Beginnt eine fortsetzbare Dekodierung (siehe extend). Unabhängig von der Engine
+        wird die Backpointer-Rekursion verwendet; Pfade entsprechen der Engine "backpointer".
+        """
+        state = DecodeState(self.model.fingerprint(), self.numeric_mode, index_array(self.model.n_states, 0))
+        return self.extend_encoded(state, self.model.encode(observations))
+
+    def extend(self, state: DecodeState, new_observations: Sequence[str]) -> DecodeState:
+        """Verlängert die Sequenz eines Zustands um neue Beobachtungen; nur diese werden berechnet."""
+        return self.extend_encoded(state, self.model.encode(new_observations))
+
+    def extend_encoded(self, state: DecodeState, codes: Sequence[int]) -> DecodeState:
+        """Wie extend, aber mit Symbol-Indizes. Der Zustand wird verändert und zurückgegeben."""
+        if state.fingerprint != self.model.fingerprint() or state.numeric_mode != self.numeric_mode:
+            raise ValueError("Der Zustand gehört zu einem anderen Modell oder einer anderen Zahlendarstellung.")
+        if len(codes) == 0:
+            return state
+
+        n = self.model.n_states
+        tracer = self.tracer
+        tracer.on_decode_begin(len(codes), n, "incremental")
+        # Gerechnet wird in lokalen Variablen; der Zustand wird erst nach Erfolg geändert,
+        # bei einem Fehler (z. B. kein gültiger Pfad) bleibt er unverändert
+        column, log_scale, length = state.column, state.log_scale, state.length
+        first = 0
+        if column is None:
+            tracer.begin_phase("init")
+            column, log_scale = self.initial_column(codes[0])
+            length = 1
+            first = 1
+            tracer.end_phase("init", n)
+
+        steps = len(codes) - first
+        rows = None
+        if steps > 0:
+            # Backpointer der neuen Zeitpunkte: Zeile des Zeitpunkts first + k liegt bei k * N
+            tracer.begin_phase("recursion")
+            rows = index_array(n, steps * n)
+            column, step_scale = self.forward(codes, first, len(codes), column, rows, first)
+            log_scale += step_scale
+            length += steps
+            tracer.end_phase("recursion", steps * n)
+
+        if rows is not None:
+            state.backpointers.extend(rows)
+        state.column, state.log_scale, state.length = column, log_scale, length
+        tracer.on_decode_end()
+        return state
+
+    def path(self, state: DecodeState) -> List[str]:
+        """Bester Pfad für die bisherige Sequenz eines Zustands (Traceback, der Zustand bleibt erhalten)."""
+        return self.model.state_names(self.path_encoded(state))
+
+    def path_encoded(self, state: DecodeState) -> array:
+        """Wie path, aber als Array von Zustands-Indizes."""
+        if state.length == 0:
+            return index_array(self.model.n_states, 0)
+        column = state.column
+        final_state = max(range(len(column)), key=column.__getitem__)
+        return self._traceback(state.backpointers, 1, state.length, final_state)
+
+    def log_probability(self, state: DecodeState) -> float:
+        """Log-Wahrscheinlichkeit des besten Pfades für die bisherige Sequenz eines Zustands."""
+        if state.length == 0:
+            return 0.0
+        column = state.column
+        final_state = max(range(len(column)), key=column.__getitem__)
+        return self._column_log_probability(column, final_state, state.log_scale)
+
+    # ---------- Engine "backpointer" ----------
+    def _decode_backpointer(self, codes: Sequence[int]) -> Tuple[array, float]:
+        """
+        Viterbi mit Backpointer-Tabelle: Es werden nur zwei Spalten mit Wahrscheinlichkeiten
+        gehalten, für jeden Zeitpunkt und Zustand wird der beste Vorgänger als kleine Ganzzahl
+        gespeichert. Der Pfad wird am Ende mit einem einzigen Traceback rekonstruiert.
+
+        Rechenreihenfolge und Tie-Breaking (erster Vorgänger mit echt größerer Wahrscheinlichkeit,
+        erster bester Endzustand) entsprechen der Engine "classic". Ausnahme bei Modellen mit
+        Nullwahrscheinlichkeiten: "classic" bricht ab, sobald eine einzelne Zelle keinen gültigen
+        Vorgänger hat; hier behält eine solche Zelle Wahrscheinlichkeit 0 (bzw. -inf), und
+        "Kein gültiger Pfad gefunden." wird erst gemeldet, wenn die ganze Spalte unerreichbar ist.
+        """
+        n = self.model.n_states
+        length = len(codes)
+        if length == 0:
+            return index_array(n, 0), 0.0
+
+        # Backpointer für t = 1..T-1, zeilenweise: backpointers[(t - 1) * N + j]
+        backpointers = index_array(n, (length - 1) * n)
+
+        tracer = self.tracer
+        tracer.begin_phase("init")
+        column, log_scale = self.initial_column(codes[0])
+        tracer.end_phase("init", n)
+
+        tracer.begin_phase("recursion")
+        column, step_scale = self.forward(codes, 1, length, column, backpointers, 1)
+        tracer.end_phase("recursion", (length - 1) * n)
+
+        tracer.begin_phase("traceback")
+        final_state = max(range(n), key=column.__getitem__)
+        path = self._traceback(backpointers, 1, length, final_state)
+        tracer.end_phase("traceback")
+        return path, self._column_log_probability(column, final_state, log_scale + step_scale)
+
+    # ---------- Rekursionsschritte (auch für StreamingViterbiDecoder und parallel_viterbi) ----------
+    def initial_column(self, symbol: int) -> Tuple[List[float], float]:
+        """
+        Initialisierung (t = 0): Start- und Emissionswahrscheinlichkeit kombinieren.
+        Gibt die Spalte und den Logarithmus ihres Skalierungsfaktors zurück (0.0 außer bei "scaled").
+        """
+        emit = self.model.emission_columns(self.use_log)[symbol]
+        if self.use_log:
+            start = self.model.start_log
+            return [start[i] + emit[i] for i in range(self.model.n_states)], 0.0
+        start = self.model.start
+        column = [start[i] * emit[i] for i in range(self.model.n_states)]
+        if self.scaled:
+            maximum = max(column)
+            if maximum <= 0.0:
+                raise ValueError("Kein gültiger Pfad gefunden.")
+            if maximum < self.RESCALE_BELOW:
+                return [value / maximum for value in column], math.log(maximum)
+        return column, 0.0
+
+    def forward(self, codes: Sequence[int], start: int, end: int, column: List[float],
+                 backpointers: array, offset: int) -> Tuple[List[float], float]:
+        """
+        Rekursion für die Zeitpunkte start..end-1 ausgehend von der Spalte zum Zeitpunkt start-1.
+        Der beste Vorgänger für (t, j) wird in backpointers[(t - offset) * N + j] abgelegt.
+        Gibt die Spalte zum Zeitpunkt end-1 und die Summe der Log-Skalierungsfaktoren
+        (nur bei "scaled", sonst 0.0) zurück.
+        """
+        n = self.model.n_states
+        states = range(n)
+        use_log = self.use_log
+        scaled = self.scaled
+        trans_cols = self.model.transition_columns(use_log)
+        emit_cols = self.model.emission_columns(use_log)
+        invalid = float("-inf") if use_log else 0.0
+        log_scale = 0.0
+        log = math.log
+        rescale_below = self.RESCALE_BELOW
+
+        for t in range(start, end):
+            emit = emit_cols[codes[t]]
+            base = (t - offset) * n
+            new_column = []
+
+            for j in states:
+                trans = trans_cols[j]
+                emit_p = emit[j]
+                best_prob = invalid
+                best_prev = 0
+                if use_log:
+                    for i in states:
+                        prob = column[i] + trans[i] + emit_p
+                        if prob > best_prob:
+                            best_prob = prob
+                            best_prev = i
+                else:
+                    for i in states:
+                        prob = column[i] * trans[i] * emit_p
+                        if prob > best_prob:
+                            best_prob = prob
+                            best_prev = i
+                new_column.append(best_prob)
+                backpointers[base + j] = best_prev
+
+            maximum = max(new_column)
+            if maximum == invalid:
+                raise ValueError("Kein gültiger Pfad gefunden.")
+            if scaled and maximum < rescale_below:
+                # Spalte auf Maximum 1 normieren; ein Logarithmus pro Normierung, nicht pro Zelle
+                new_column = [value / maximum for value in new_column]
+                log_scale += log(maximum)
+            column = new_column
+
+        return column, log_scale
+
+    def _traceback(self, backpointers: array, offset: int, length: int, final_state: int) -> array:
+        """Rekonstruiert den Pfad rückwärts aus der Backpointer-Tabelle."""
+        path = index_array(self.model.n_states, length)
+        path[length - 1] = final_state
+        self.trace_segment(path, backpointers, offset, offset, length - 1)
+        return path
+
+    def trace_segment(self, path: array, backpointers: array, offset: int, start: int, end: int) -> int:
+        """
+        Traceback für die Zeitpunkte end..start: path[end] muss gesetzt sein,
+        path[start-1..end-1] wird aus backpointers[(t - offset) * N + j] ergänzt.
+        Gibt den Zustand zum Zeitpunkt start-1 zurück.
+        """
+        n = self.model.n_states
+        state = path[end]
+        for t in range(end, start - 1, -1):
+            state = backpointers[(t - offset) * n + state]
+            path[t - 1] = state
+        return state
+
+    def _column_log_probability(self, column, state: int, log_scale: float = 0.0) -> float:
+        """
+        Logarithmus der Wahrscheinlichkeit eines Eintrags der letzten Spalte
+        (bei "scaled" zuzüglich der aufsummierten Log-Skalierungsfaktoren).
+        """
+        if self.use_log:
+            return column[state]
+        if column[state] <= 0.0:
+            return float("-inf")
+        return math.log(column[state]) + log_scale
+
+    # ---------- Engine "checkpoint" ----------
+    def _decode_checkpoint(self, codes: Sequence[int]) -> Tuple[array, float]:
+        """
+        Speicherbegrenzter Viterbi: Im Vorwärtslauf wird nur alle k Zeitschritte die
+        Spalte als Checkpoint gespeichert. Beim Traceback wird jedes Segment (vom letzten
+        zum ersten) ab seinem Checkpoint erneut berechnet, diesmal mit Backpointern für
+        genau dieses Segment. Der Arbeitsspeicher sinkt von T·N Backpointern auf
+        etwa T/k Spalten plus k·N Backpointer, auf Kosten eines zweiten Vorwärtslaufs.
+
+        Da die Neuberechnung dieselben Rechenschritte ausführt, ist das Ergebnis
+        identisch zur Engine "backpointer".
+        """
+        n = self.model.n_states
+        length = len(codes)
+        if length == 0:
+            return index_array(n, 0), 0.0
+
+        segment = self._checkpoint_segment_length(length)
+        if segment >= length - 1:
+            # Die komplette Backpointer-Tabelle passt ins Speicherlimit
+            return self._decode_backpointer(codes)
+
+        tracer = self.tracer
+        backpointers = index_array(n, segment * n)  # Puffer für ein Segment, wird wiederverwendet
+        # Alle Checkpoint-Spalten in einem zusammenhängenden Array: Spalte c liegt bei [c * N, (c + 1) * N)
+        count = -(-(length - 1) // segment)
+        checkpoints = array("d", bytes(8 * count * n))
+
+        # --- 1. Vorwärtslauf: Spalten an den Segmentanfängen 0, k, 2k, ... merken ---
+        tracer.begin_phase("forward")
+        column, log_scale = self.initial_column(codes[0])
+        for index, seg_start in enumerate(range(0, length - 1, segment)):
+            checkpoints[index * n:(index + 1) * n] = array("d", column)
+            seg_end = min(seg_start + segment, length - 1)
+            column, step_scale = self.forward(codes, seg_start + 1, seg_end + 1, column, backpointers, seg_start + 1)
+            log_scale += step_scale
+        tracer.end_phase("forward", length * n)
+
+        # --- 2. Traceback: Segmente rückwärts neu berechnen ---
+        tracer.begin_phase("traceback")
+        final_state = max(range(n), key=column.__getitem__)
+        path = index_array(n, length)
+        path[length - 1] = final_state
+        for index in range(count - 1, -1, -1):
+            seg_start = index * segment
+            seg_end = min(seg_start + segment, length - 1)
+            column_start = checkpoints[index * n:(index + 1) * n]
+            self.forward(codes, seg_start + 1, seg_end + 1, column_start, backpointers, seg_start + 1)
+            self.trace_segment(path, backpointers, seg_start + 1, seg_start + 1, seg_end)
+        tracer.end_phase("traceback", (length - 1) * n)
+
+        tracer.record_counters({"checkpoints": count, "segment_length": segment})
+        return path, self._column_log_probability(column, final_state, log_scale)
+
+    def _checkpoint_segment_length(self, length: int) -> int:
+        """
+        Wählt die Segmentlänge k für die Engine "checkpoint".
+        Ohne Speicherlimit ist k = ⌈√T⌉. Mit Limit wird das größte k gewählt, für das
+        die Puffer der Engine ins Limit passen:
+
+        - ⌈(T-1)/k⌉ Checkpoint-Spalten in einem Array (je N·8 Bytes),
+        - k·N Backpointer für ein Segment,
+        - der Ergebnispfad mit T Zustands-Indizes.
+
+        Nicht enthalten sind die Eingabe, die Arbeitsspalten der Rekursion (O(N))
+        und der feste Objekt-Overhead von Python (einige hundert Bytes).
+        """
+        n = self.model.n_states
+        steps = length - 1
+        if self.memory_limit is None:
+            return max(1, math.isqrt(steps - 1) + 1) if steps > 0 else 1
+
+        column_bytes = n * 8
+        index_bytes = array(index_typecode(n)).itemsize
+        backpointer_bytes = n * index_bytes
+        path_bytes = length * index_bytes
+
+        def cost(k: int) -> int:
+            return -(-steps // k) * column_bytes + k * backpointer_bytes + path_bytes
+
+        # Das Minimum der (konvexen) Kostenfunktion liegt bei etwa √(T · Spalte / Backpointer-Zeile)
+        best = max(1, min(steps, round(math.sqrt(steps * column_bytes / backpointer_bytes))))
+        for k in (best - 1, best + 1):
+            if 1 <= k <= steps and cost(k) < cost(best):
+                best = k
+        if cost(best) > self.memory_limit:
+            raise ValueError(
+                f"Speicherlimit von {self.memory_limit} Bytes zu klein; "
+                f"mindestens {cost(best)} Bytes werden benötigt."
+            )
+
+        # Größtes k innerhalb des Limits per binärer Suche (Kosten steigen rechts vom Minimum)
+        low, high = best, max(steps, 1)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if cost(mid) <= self.memory_limit:
+                low = mid
+            else:
+                high = mid - 1
+        return low
+
+    # ---------- Engine "sparse" ----------
+    def _decode_sparse(self, codes: Sequence[int]) -> Tuple[array, float]:
+        """
+        Viterbi über dünnbesetzte Übergänge: Es werden nur aktive Zustände (gültiger Wert,
+        nicht verworfen) und deren Nachfolger mit Übergangswahrscheinlichkeit > 0 betrachtet.
+        Die Laufzeit hängt damit von der Anzahl aktiver Zustände und Kanten ab, nicht von N².
+
+        Ohne Pruning ist das Ergebnis identisch zur Engine "backpointer" (Vorgänger werden
+        in aufsteigender Reihenfolge geprüft, es gewinnt der erste echt größere Wert).
+        Mit beam_width/top_k ist das Ergebnis eine Näherung.
+        Die Anzahl aktiver und verworfener Zellen wird über tracer.record_counters gemeldet.
+        """
+        n = self.model.n_states
+        length = len(codes)
+        if length == 0:
+            return index_array(n, 0), 0.0
+
+        use_log = self.use_log
+        invalid = float("-inf") if use_log else 0.0
+        successors = self.model.successors(use_log)
+        emit_cols = self.model.emission_columns(use_log)
+        backpointers = index_array(n, (length - 1) * n)
+        counters = {"cells_total": length * n, "cells_active": 0, "cells_pruned": 0, "transitions_evaluated": 0}
+        tracer = self.tracer
+
+        tracer.begin_phase("init")
+        initial, log_scale = self.initial_column(codes[0])
+        active = self._prune({i: v for i, v in enumerate(initial) if v > invalid}, counters)
+        tracer.end_phase("init", n)
+        scaled = self.scaled
+
+        tracer.begin_phase("recursion")
+        for t in range(1, length):
+            emit = emit_cols[codes[t]]
+            base = (t - 1) * n
+            scores: Dict[int, float] = {}
+            evaluated = 0
+
+            for i, prev_v in active:
+                for j, trans_p in successors[i]:
+                    emit_p = emit[j]
+                    if emit_p == invalid:
+                        continue
+                    evaluated += 1
+                    prob = prev_v + trans_p + emit_p if use_log else prev_v * trans_p * emit_p
+                    if prob > scores.get(j, invalid):
+                        scores[j] = prob
+                        backpointers[base + j] = i
+
+            counters["transitions_evaluated"] += evaluated
+            if not scores:
+                raise ValueError("Kein gültiger Pfad gefunden.")
+            if scaled:
+                maximum = max(scores.values())
+                if maximum < self.RESCALE_BELOW:
+                    scores = {j: value / maximum for j, value in scores.items()}
+                    log_scale += math.log(maximum)
+            active = self._prune(scores, counters)
+        tracer.end_phase("recursion", counters["cells_active"])
+
+        tracer.begin_phase("traceback")
+        # Leer nur bei einem einzelnen Symbol ohne gültigen Startzustand: wie bei "backpointer"
+        # gewinnt dann der erste Zustand (mit Wahrscheinlichkeit 0)
+        final_state, final_value = active[0] if active else (0, invalid)
+        for state, value in active:
+            if value > final_value:
+                final_state, final_value = state, value
+        path = self._traceback(backpointers, 1, length, final_state)
+        tracer.end_phase("traceback")
+
+        tracer.record_counters(counters)
+        column = {final_state: final_value}
+        return path, self._column_log_probability(column, final_state, log_scale)
+
+    def _prune(self, scores: Dict[int, float], counters: Dict[str, int]) -> List[Tuple[int, float]]:
+        """
+        Wendet Beam- und Top-K-Pruning auf eine Spalte an und gibt die aktiven
+        Zustände als (Zustand, Wert)-Liste in aufsteigender Zustandsreihenfolge zurück.
+        """
+        invalid = float("-inf") if self.use_log else 0.0
+        active = sorted((state, value) for state, value in scores.items() if value > invalid)
+        kept = active
+
+        if self.beam_width is not None and active:
+            best = max(value for _, value in active)
+            if self.use_log:
+                threshold = best - self.beam_width
+            else:
+                threshold = best * math.exp(-self.beam_width)
+            kept = [(state, value) for state, value in kept if value >= threshold]
+
+        if self.top_k is not None and len(kept) > self.top_k:
+            # Die K besten Zustände behalten (bei Gleichstand der kleinere Index)
+            best_k = sorted(kept, key=lambda item: (-item[1], item[0]))[:self.top_k]
+            kept = sorted(best_k)
+
+        counters["cells_active"] += len(kept)
+        counters["cells_pruned"] += len(active) - len(kept)
+        return kept
+
+    # ---------- Engine "parallel" ----------
+    def _decode_parallel(self, codes: Sequence[int]) -> Tuple[array, float]:
+        """
+        Verteilt eine lange Sequenz auf mehrere Prozesse (siehe src/parallel_viterbi.py).
+        Mit nur einem Prozess lohnt sich das Verfahren nicht (die Transfermatrizen kosten
+        N-mal so viel wie die normale Rekursion); dann wird "backpointer" verwendet.
+        """
+        from src.parallel_viterbi import decode_parallel
+        if len(codes) == 0:
+            return index_array(self.model.n_states, 0), 0.0
+        workers = (os.cpu_count() or 1) if self.workers is None else self.workers
+        if workers <= 1:
+            return self._decode_backpointer(codes)
+        self.tracer.begin_phase("parallel")
+        result = decode_parallel(self.model, codes, workers=self.workers)
+        self.tracer.end_phase("parallel", len(codes) * self.model.n_states)
+        return result
+
+    # ---------- Engine "numpy" ----------
+    def _decode_numpy(self, codes: Sequence[int]) -> Tuple[array, float]:
+        """
+        Vektorisierte Viterbi-Rekursion: Pro Zeitschritt wird die Matrix
+        scores[i, j] = V[t-1][i] + log P(i → j) + log P(j erzeugt o_t)
+        (bzw. das Produkt im Normalmodus) auf einmal berechnet und spaltenweise
+        max/argmax gebildet. np.argmax liefert den ersten Maximalwert, damit sind Ergebnis und
+        Tie-Breaking identisch zur Engine "backpointer" (auch bei unerreichbaren Einzelzellen,
+        bei denen "classic" abbricht).
+        """
+        n = self.model.n_states
+        length = len(codes)
+        if length == 0:
+            return index_array(n, 0), 0.0
+
+        start, transitions, emissions = self.model.numpy_tables(self.use_log)
+        emit_by_symbol = np.ascontiguousarray(emissions.T)  # (M, N): Emissionsspalte pro Symbol
+        codes = np.asarray(codes)
+        invalid = -np.inf if self.use_log else 0.0
+
+        backpointers = np.zeros((length - 1, n), dtype=np.dtype(index_typecode(n)))
+        scores = np.empty((n, n), dtype=np.float64)
+        targets = np.arange(n)
+
+        tracer = self.tracer
+        tracer.begin_phase("init")
+        log_scale = 0.0
+        if self.use_log:
+            column = start + emit_by_symbol[codes[0]]
+        else:
+            column = start * emit_by_symbol[codes[0]]
+            if self.scaled:
+                maximum = column.max()
+                if maximum <= 0.0:
+                    raise ValueError("Kein gültiger Pfad gefunden.")
+                if maximum < self.RESCALE_BELOW:
+                    column = column / maximum
+                    log_scale = math.log(maximum)
+        tracer.end_phase("init", n)
+
+        tracer.begin_phase("recursion")
+        for t in range(1, length):
+            # Gleiche Rechenreihenfolge wie in der Lehrversion: (V + Übergang) + Emission
+            if self.use_log:
+                np.add(column[:, None], transitions, out=scores)
+                scores += emit_by_symbol[codes[t]]
+            else:
+                np.multiply(column[:, None], transitions, out=scores)
+                scores *= emit_by_symbol[codes[t]]
+
+            best_prev = scores.argmax(axis=0)
+            column = scores[best_prev, targets]
+            backpointers[t - 1] = best_prev
+
+            maximum = column.max()
+            if maximum == invalid:
+                raise ValueError("Kein gültiger Pfad gefunden.")
+            if self.scaled and maximum < self.RESCALE_BELOW:
+                column /= maximum
+                log_scale += math.log(maximum)
+        tracer.end_phase("recursion", (length - 1) * n)
+
+        tracer.begin_phase("traceback")
+        column = column.tolist()
+        final_state = max(range(n), key=column.__getitem__)
+        path = self._traceback(memoryview(backpointers.reshape(-1)), 1, length, final_state)
+        tracer.end_phase("traceback")
+        return path, self._column_log_probability(column, final_state, log_scale)
+
+    # ---------- Engine "classic" ----------
+    def _decode_classic(self, observations: List[str]) -> List[str]:
+        """
+        Lehrversion des Viterbi-Algorithmus: speichert für jeden Zustand den kompletten
+        bisherigen Pfad und meldet jede Zelle der Trellis an den Tracer
+        (mit ConsoleTracer wird sie ausgegeben).
+        """
         V = [{}]  # Matrix für Wahrscheinlichkeiten (pro Zustand, pro Zeit)
         path: Dict[str, List[str]] = {}  # Speichert den bisher besten Pfad für jeden Zustand
+        tracer = self.tracer
+        n = self.model.n_states
 
         # --- 1. Initialisierung (t = 0) ---
-        for state in self.hmm.states:
+        tracer.begin_phase("init")
+        for state in self.model.states:
             if self.use_log:
                 # Startwahrscheinlichkeit + Emissionswahrscheinlichkeit (Log-Form)
-                start_p = self.hmm.get_start_prob_log(state)
-                emit_p = self.hmm.get_emission_prob_log(state, observations[0])
+                start_p = self.model.get_start_prob_log(state)
+                emit_p = self.model.get_emission_prob_log(state, observations[0])
                 V[0][state] = start_p + emit_p
-                print(f"V[{state}] = log({start_p:.4f}) + log({emit_p:.4f}) = {V[0][state]:.4f}")
             else:
                 # Startwahrscheinlichkeit × Emissionswahrscheinlichkeit (Normalform)
-                start_p = self.hmm.get_start_prob_normal(state)
-                emit_p = self.hmm.get_emission_prob_normal(state, observations[0])
+                start_p = self.model.get_start_prob_normal(state)
+                emit_p = self.model.get_emission_prob_normal(state, observations[0])
                 V[0][state] = start_p * emit_p
-                print(f"V[{state}] = {start_p:.4f} * {emit_p:.4f} = {V[0][state]:.6f}")
+            tracer.on_init(state, start_p, emit_p, V[0][state], self.use_log)
 
             # Anfangspfad für diesen Zustand
             path[state] = [state]
+        tracer.end_phase("init", n)
 
         # --- 2. Rekursion (t > 0) ---
+        tracer.begin_phase("recursion")
         for t in range(1, len(observations)):
             V.append({})
             new_path: Dict[str, List[str]] = {}
 
             # Für jeden möglichen aktuellen Zustand den besten vorherigen Zustand finden
-            for curr_state in self.hmm.states:
+            for curr_state in self.model.states:
                 max_prob, best_prev = self._get_best_previous_state(
                     V, t, curr_state, observations[t]
                 )
@@ -51,10 +738,13 @@ class ViterbiDecoder:
 
             # Pfade für die nächste Iteration aktualisieren
             path = new_path  
+        tracer.end_phase("recursion", (len(observations) - 1) * n)
 
         # --- 3. Termination: besten Endzustand wählen ---
+        tracer.begin_phase("traceback")
         last_probs = V[-1]
         final_state = max(last_probs, key=last_probs.get)
+        tracer.end_phase("traceback")
         return path[final_state]
     
     def _get_best_previous_state(self, V: List[Dict[str, float]], t: int, curr_state: str, observation: str):
@@ -64,24 +754,24 @@ class ViterbiDecoder:
         """
         best_prob = float("-inf") if self.use_log else 0.0
         best_prev_state = None
+        tracer = self.tracer
 
-        print(f"\n[t={t}] Zielzustand: {curr_state} | Beobachtung: {observation}")
+        tracer.on_cell_begin(t, curr_state, observation)
 
-        for prev_state in self.hmm.states:
+        for prev_state in self.model.states:
             prev_v = V[t - 1][prev_state]
 
             if self.use_log:
                 # Log-Variante: Wahrscheinlichkeiten addieren
-                trans_prob = self.hmm.get_transition_prob_log(prev_state, curr_state)
-                emit_prob = self.hmm.get_emission_prob_log(curr_state, observation)
+                trans_prob = self.model.get_transition_prob_log(prev_state, curr_state)
+                emit_prob = self.model.get_emission_prob_log(curr_state, observation)
                 prob = prev_v + trans_prob + emit_prob
-                print(f"  {prev_state} → {curr_state}: {prev_v:.4f} + {trans_prob:.4f} + {emit_prob:.4f} = {prob:.4f}")
             else:
                 # Normalform: Wahrscheinlichkeiten multiplizieren
-                trans_prob = self.hmm.get_transition_prob_normal(prev_state, curr_state)
-                emit_prob = self.hmm.get_emission_prob_normal(curr_state, observation)
+                trans_prob = self.model.get_transition_prob_normal(prev_state, curr_state)
+                emit_prob = self.model.get_emission_prob_normal(curr_state, observation)
                 prob = prev_v * trans_prob * emit_prob
-                print(f"  {prev_state} → {curr_state}: {prev_v:.6f} * {trans_prob:.4f} * {emit_prob:.4f} = {prob:.6f}")
+            tracer.on_candidate(t, prev_state, curr_state, prev_v, trans_prob, emit_prob, prob, self.use_log)
 
             # Prüfen, ob dies der bisher beste vorherige Zustand ist
             if prob > best_prob:
@@ -91,5 +781,5 @@ class ViterbiDecoder:
         if best_prev_state is None:
             raise ValueError("Kein gültiger Pfad gefunden.")
         
-        print(f"  ➤ Bester vorheriger Zustand: {best_prev_state} mit Wahrscheinlichkeit {best_prob:.6f}")
+        tracer.on_cell_end(t, curr_state, best_prev_state, best_prob)
         return best_prob, best_prev_state
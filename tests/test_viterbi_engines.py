@@ -0,0 +1,47 @@
+import unittest
+from src.hidden_markov_model import HMM
+from src.viterbi_decoder import ViterbiDecoder
+
+
+def _zero_start_model() -> HMM:
+    """Start {A: 1, B: 0} und Einheitsmatrix: Zustand B ist zu keinem Zeitpunkt erreichbar."""
+    return HMM(["A", "B"], {"A": 1.0, "B": 0.0},
+               {"A": {"A": 1.0, "B": 0.0}, "B": {"A": 0.0, "B": 1.0}},
+               {"A": {"x": 1.0}, "B": {"x": 1.0}})
+
+
+class UnreachableCellTest(unittest.TestCase):
+    """Verhalten bei einzelnen unerreichbaren Zellen (siehe README, Dekodier-Engines)."""
+
+    def test_classic_raises_on_unreachable_cell(self):
+        for use_log in (False, True):
+            with self.assertRaisesRegex(ValueError, "Kein gültiger Pfad"):
+                ViterbiDecoder(_zero_start_model(), use_log=use_log, engine="classic").decode(["x", "x"])
+
+    def test_other_engines_skip_unreachable_cell(self):
+        hmm = _zero_start_model()
+        for engine in ("backpointer", "numpy", "checkpoint", "sparse"):
+            for mode in ("normal", "log", "scaled"):
+                with self.subTest(engine=engine, numeric_mode=mode):
+                    try:
+                        decoder = ViterbiDecoder(hmm, engine=engine, numeric_mode=mode)
+                    except ImportError:
+                        self.skipTest("NumPy nicht installiert")
+                    self.assertEqual(decoder.decode(["x", "x"]), ["A", "A"])
+
+    def test_unreachable_column_raises_for_all_engines(self):
+        hmm = HMM(["A", "B"], {"A": 1.0, "B": 0.0},
+                  {"A": {"A": 1.0, "B": 0.0}, "B": {"A": 0.0, "B": 1.0}},
+                  {"A": {"x": 1.0, "y": 0.0}, "B": {"x": 0.0, "y": 1.0}})
+        for engine in ("classic", "backpointer", "numpy", "checkpoint", "sparse"):
+            with self.subTest(engine=engine):
+                try:
+                    decoder = ViterbiDecoder(hmm, use_log=True, engine=engine)
+                except ImportError:
+                    continue
+                with self.assertRaisesRegex(ValueError, "Kein gültiger Pfad"):
+                    decoder.decode(["x", "y"])
+
+
+if __name__ == "__main__":
+    unittest.main()